@@ -0,0 +1,318 @@
+"""
+Columnar post storage and aggregates for the analytics dashboard.
+
+``PostFrame`` is filled once from scraped posts and keeps only what the
+analytics and exports read: numeric NumPy arrays for engagement, interned
+owner and hashtag strings, and caption previews. pandas is imported lazily so
+the scraper CLI can use this module without it.
+"""
+import argparse
+import json
+import os
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from exporters import iter_parquet_records
+from models import InstagramPost
+
+PostLike = Union[InstagramPost, Dict]
+
+CAPTION_PREVIEW_LENGTH = 100
+
+
+def _field(post: PostLike, name: str, default=None):
+    """Read a field from either a post model or its model_dump() dict."""
+    if isinstance(post, dict):
+        return post.get(name, default)
+    return getattr(post, name, default)
+
+
+def _wall_clock(timestamp) -> datetime:
+    """Naive wall-clock time of a post, as the post cards display it."""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    return timestamp.replace(tzinfo=None)
+
+
+class PostFrame:
+    """
+    Compact, column-oriented view of a list of posts.
+
+    Hashtags are stored CSR-style: the codes of post ``i`` are
+    ``hashtag_codes[hashtag_offsets[i]:hashtag_offsets[i + 1]]`` and index
+    into ``hashtags``. Owners are interned the same way through ``owner_codes``.
+    """
+
+    def __init__(self, short_codes: np.ndarray, likes: np.ndarray, comments: np.ndarray,
+                 timestamps: np.ndarray, owner_codes: np.ndarray, owners: List[str],
+                 hashtag_codes: np.ndarray, hashtag_offsets: np.ndarray, hashtags: List[str],
+                 captions: np.ndarray):
+        self.short_codes = short_codes
+        self.likes = likes
+        self.comments = comments
+        self.timestamps = timestamps
+        self.owner_codes = owner_codes
+        self.owners = owners
+        self.hashtag_codes = hashtag_codes
+        self.hashtag_offsets = hashtag_offsets
+        self.hashtags = hashtags
+        self.captions = captions
+
+    @classmethod
+    def from_posts(cls, posts: Iterable[PostLike]) -> 'PostFrame':
+        """Build a frame in a single pass over posts (models or dicts)."""
+        short_codes, likes, comments, timestamps, owner_codes, captions = [], [], [], [], [], []
+        hashtag_codes, hashtag_offsets = [], [0]
+        owner_index: Dict[str, int] = {}
+        hashtag_index: Dict[str, int] = {}
+
+        for post in posts:
+            short_codes.append(_field(post, 'shortCode', ''))
+            likes.append(_field(post, 'likesCount', 0) or 0)
+            comments.append(_field(post, 'commentsCount', 0) or 0)
+            timestamps.append(_wall_clock(_field(post, 'timestamp')))
+
+            owner = _field(post, 'ownerUsername', '') or ''
+            owner_codes.append(owner_index.setdefault(owner, len(owner_index)))
+
+            for tag in _field(post, 'hashtags', None) or ():
+                hashtag_codes.append(hashtag_index.setdefault(str(tag), len(hashtag_index)))
+            hashtag_offsets.append(len(hashtag_codes))
+
+            caption = _field(post, 'caption', None)
+            captions.append(str(caption)[:CAPTION_PREVIEW_LENGTH] + '...' if caption else '')
+
+        return cls(
+            short_codes=np.array(short_codes, dtype=str),
+            likes=np.array(likes, dtype=np.int64),
+            comments=np.array(comments, dtype=np.int64),
+            timestamps=np.array(timestamps, dtype='datetime64[s]'),
+            owner_codes=np.array(owner_codes, dtype=np.int32),
+            owners=list(owner_index),
+            hashtag_codes=np.array(hashtag_codes, dtype=np.int32),
+            hashtag_offsets=np.array(hashtag_offsets, dtype=np.int64),
+            hashtags=list(hashtag_index),
+            captions=np.array(captions, dtype=object)
+        )
+
+    def __len__(self) -> int:
+        return len(self.likes)
+
+    @property
+    def total_likes(self) -> int:
+        return int(self.likes.sum())
+
+    @property
+    def total_comments(self) -> int:
+        return int(self.comments.sum())
+
+    @property
+    def avg_likes(self) -> int:
+        return self.total_likes // len(self) if len(self) else 0
+
+    @property
+    def avg_comments(self) -> int:
+        return self.total_comments // len(self) if len(self) else 0
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the frame's arrays and interned strings."""
+        arrays = (self.short_codes, self.likes, self.comments, self.timestamps, self.owner_codes,
+                  self.hashtag_codes, self.hashtag_offsets, self.captions)
+        strings = sum(len(text) + 49 for text in self.owners) + sum(len(text) + 49 for text in self.hashtags)
+        captions = sum(len(text) + 49 for text in self.captions)
+        return sum(array.nbytes for array in arrays) + strings + captions
+
+    def post_urls(self) -> np.ndarray:
+        return np.char.add(np.char.add("https://www.instagram.com/p/", self.short_codes), "/")
+
+    def engagement_table(self):
+        """Rows for the "Post Engagement Details" table as a DataFrame."""
+        import pandas as pd
+
+        return pd.DataFrame({
+            'Date': pd.Series(self.timestamps).dt.strftime('%Y-%m-%d %H:%M'),
+            'Likes': self.likes,
+            'Comments': self.comments,
+            'URL': self.post_urls(),
+            'Caption': self.captions
+        })
+
+    def to_dataframe(self):
+        """One row per post, with owners and hashtags decoded back to strings."""
+        import pandas as pd
+
+        hashtags = np.array(self.hashtags, dtype=object)
+        return pd.DataFrame({
+            'shortCode': self.short_codes,
+            'ownerUsername': pd.Categorical.from_codes(self.owner_codes, categories=self.owners)
+            if self.owners else pd.Categorical([]),
+            'timestamp': self.timestamps,
+            'likesCount': self.likes,
+            'commentsCount': self.comments,
+            'hashtags': [
+                list(hashtags[self.hashtag_codes[start:end]])
+                for start, end in zip(self.hashtag_offsets[:-1], self.hashtag_offsets[1:])
+            ]
+        })
+
+    def post_index(self) -> np.ndarray:
+        """Post number of every entry in ``hashtag_codes`` (the exploded view)."""
+        return np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.hashtag_offsets))
+
+
+@dataclass
+class HashtagStats:
+    """Per-hashtag aggregates, one array entry per distinct hashtag."""
+    tags: np.ndarray
+    count: np.ndarray
+    mean_likes: np.ndarray
+    mean_comments: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def top(self, k: Optional[int] = None) -> np.ndarray:
+        """Indices of the ``k`` most used hashtags, most used first (first seen wins ties)."""
+        if k is not None and k <= 0:
+            return np.array([], dtype=np.int64)
+        order_all = k is None or k >= len(self)
+        candidates = np.arange(len(self)) if order_all else np.argpartition(-self.count, k - 1)[:k]
+        if not order_all:
+            # argpartition puts an arbitrary subset of tied counts at the cut;
+            # swap in the earliest ones so the result matches a full sort
+            threshold = self.count[candidates].min()
+            above = candidates[self.count[candidates] > threshold]
+            tied = np.flatnonzero(self.count == threshold)[:k - len(above)]
+            candidates = np.concatenate([above, tied])
+        return candidates[np.lexsort((candidates, -self.count[candidates]))]
+
+    def rows(self, k: Optional[int] = None) -> List[Dict]:
+        """Rows for the "Hashtag Analysis" table."""
+        return [
+            {
+                'Hashtag': f"#{self.tags[index]}",
+                'Usage Count': int(self.count[index]),
+                'Avg. Likes': int(self.mean_likes[index]),
+                'Avg. Comments': int(self.mean_comments[index])
+            }
+            for index in self.top(k)
+        ]
+
+
+def _as_frame(posts: Union[PostFrame, Iterable[PostLike]]) -> PostFrame:
+    return posts if isinstance(posts, PostFrame) else PostFrame.from_posts(posts)
+
+
+def hashtag_stats(posts: Union[PostFrame, Iterable[PostLike]]) -> HashtagStats:
+    """
+    Usage count and integer mean likes/comments per hashtag.
+
+    Every occurrence counts, as in the original dashboard loop, so a tag
+    repeated within one post is counted twice.
+    """
+    frame = _as_frame(posts)
+    codes = frame.hashtag_codes
+    post_index = frame.post_index()
+    size = len(frame.hashtags)
+
+    count = np.bincount(codes, minlength=size)
+    total_likes = np.bincount(codes, weights=frame.likes[post_index], minlength=size)
+    total_comments = np.bincount(codes, weights=frame.comments[post_index], minlength=size)
+    safe_count = np.maximum(count, 1)
+    return HashtagStats(
+        tags=np.array(frame.hashtags, dtype=object),
+        count=count,
+        mean_likes=(total_likes // safe_count).astype(np.int64),
+        mean_comments=(total_comments // safe_count).astype(np.int64)
+    )
+
+
+def hashtag_pairs(posts: Union[PostFrame, Iterable[PostLike]], k: int = 20) -> List[Tuple[str, str, int]]:
+    """The ``k`` hashtag pairs that appear together in the most posts."""
+    frame = _as_frame(posts)
+    lengths = np.diff(frame.hashtag_offsets)
+    if not len(frame.hashtag_codes):
+        return []
+
+    # For each exploded entry, pair it with every later entry of the same post
+    local = np.arange(len(frame.hashtag_codes)) - np.repeat(frame.hashtag_offsets[:-1], lengths)
+    later = np.repeat(lengths, lengths) - local - 1
+    first = np.repeat(np.arange(len(frame.hashtag_codes)), later)
+    group_starts = np.repeat(np.cumsum(later) - later, later)
+    second = first + (np.arange(len(first)) - group_starts) + 1
+
+    a = frame.hashtag_codes[first].astype(np.int64)
+    b = frame.hashtag_codes[second].astype(np.int64)
+    distinct = a != b
+    low, high = np.minimum(a, b)[distinct], np.maximum(a, b)[distinct]
+    keys, counts = np.unique(low * len(frame.hashtags) + high, return_counts=True)
+
+    k = min(k, len(keys))
+    if not k:
+        return []
+    best = np.argpartition(-counts, k - 1)[:k]
+    best = best[np.lexsort((keys[best], -counts[best]))]
+    return [
+        (frame.hashtags[keys[index] // len(frame.hashtags)], frame.hashtags[keys[index] % len(frame.hashtags)],
+         int(counts[index]))
+        for index in best
+    ]
+
+
+def dashboard_summary(posts: Union[PostFrame, Iterable[PostLike]]) -> Dict:
+    """Everything the app's analytics section shows for one scrape result."""
+    frame = _as_frame(posts)
+    return {
+        'total_posts': len(frame),
+        'total_likes': frame.total_likes,
+        'avg_likes': frame.avg_likes,
+        'avg_comments': frame.avg_comments,
+        'engagement': frame.engagement_table(),
+        'hashtags': hashtag_stats(frame).rows()
+    }
+
+
+def _load_posts(path: str) -> Iterator[Dict]:
+    """Read posts from a JSON array export, an NDJSON file or a Parquet export directory."""
+    if os.path.isdir(path):
+        yield from iter_parquet_records(path)
+        return
+    with open(path, encoding='utf-8') as handle:
+        first = handle.read(1)
+        while first.isspace():
+            first = handle.read(1)
+        handle.seek(0)
+        if first == '[':
+            yield from json.load(handle)
+        else:
+            yield from (json.loads(line) for line in handle if line.strip())
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Print hashtag statistics for an exported result file."""
+    parser = argparse.ArgumentParser(description="Hashtag statistics for exported Instagram posts")
+    parser.add_argument("path", help="JSON, NDJSON or Parquet (directory) export from the scraper")
+    parser.add_argument("--top", type=int, default=20, help="Number of hashtags to show")
+    parser.add_argument("--pairs", type=int, default=0, help="Also show the most common hashtag pairs")
+    args = parser.parse_args(argv)
+
+    frame = PostFrame.from_posts(_load_posts(args.path))
+    stats = hashtag_stats(frame)
+    print(f"{len(frame):,} posts, {len(stats):,} hashtags")
+    print(f"{'Hashtag':<30} {'Usage':>8} {'Avg. Likes':>12} {'Avg. Comments':>14}")
+    for row in stats.rows(args.top):
+        print(f"{row['Hashtag']:<30} {row['Usage Count']:>8,} {row['Avg. Likes']:>12,} {row['Avg. Comments']:>14,}")
+    if args.pairs:
+        print()
+        for first, second, count in hashtag_pairs(frame, args.pairs):
+            print(f"#{first} + #{second}: {count:,}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
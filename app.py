@@ -3,12 +3,19 @@ import json
 from datetime import datetime
 from scraper_service import InstagramScraperService
 from models import ScraperConfig
+from analytics import dashboard_summary
+from exporters import EXPORT_FORMATS, export_bytes
+from result_cache import ResultCache
+from checkpoint_store import CheckpointStore
+from seen_index import SeenIndex
+from image_fetcher import get_default_fetcher, post_image_urls, prefetch_images
+from thumbnails import get_thumbnail_service
+from metrics import get_metrics, serve_prometheus
 import logging
 import re
 import os
 from dotenv import load_dotenv
 from pathlib import Path
-import requests
 from io import BytesIO
 import base64
 import pyperclip
@@ -19,14 +26,51 @@ from typing import Dict
 # Load environment variables at startup
 load_dotenv()
 
+@st.cache_resource(show_spinner=False)
+def get_scraper() -> InstagramScraperService:
+    """Scraper shared by all sessions, so its client and result cache are created once."""
+    return InstagramScraperService(
+        cache=ResultCache(
+            os.getenv("SCRAPER_CACHE_PATH", ".cache/results.sqlite"),
+            ttl_seconds=float(os.getenv("SCRAPER_CACHE_TTL", "3600"))
+        ),
+        checkpoints=CheckpointStore(os.getenv("SCRAPER_CHECKPOINT_PATH", ".cache/checkpoints.sqlite")),
+        seen=SeenIndex(os.getenv("SCRAPER_SEEN_PATH", ".cache/seen.sqlite"))
+    )
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_server():
+    """Serve Prometheus metrics once per process when SCRAPER_METRICS_PORT is set."""
+    port = os.getenv("SCRAPER_METRICS_PORT")
+    if port and get_metrics().enabled:
+        return serve_prometheus(int(port))
+    return None
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_analytics(results_key: str, _posts) -> Dict:
+    """
+    Analytics for a scrape result, computed once per result.
+
+    ``results_key`` identifies the scrape; the posts themselves are not
+    hashed (leading underscore) so cache lookups stay cheap on every rerun.
+    """
+    return dashboard_summary(_posts)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_export(results_key: str, fmt: str, _posts) -> bytes:
+    """Export file for a scrape result, encoded once per result and format."""
+    return export_bytes(_posts, fmt)
+
 # Initialize session state variables
 if 'scraper' not in st.session_state:
     try:
-        st.session_state.scraper = InstagramScraperService()
+        st.session_state.scraper = get_scraper()
     except ValueError as e:
         st.error(f"Error: {str(e)}")
         st.stop()
 
+start_metrics_server()
+
 if 'button_states' not in st.session_state:
     st.session_state.button_states = {}
 
@@ -40,61 +84,6 @@ def is_valid_instagram_url(url: str) -> bool:
     pattern = r'^https?:\/\/(www\.)?instagram\.com\/[a-zA-Z0-9_.]+\/?$'
     return bool(re.match(pattern, url))
 
-def fetch_image(url: str, max_retries: int = 3) -> bytes:
-    """
-    Fetch image data from URL with appropriate headers and retry logic.
-    """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Referer': 'https://www.instagram.com/'
-    }
-    
-    session = requests.Session()
-    
-    retry_strategy = requests.adapters.Retry(
-        total=max_retries,
-        backoff_factor=0.5,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["GET"]
-    )
-    
-    adapter = requests.adapters.HTTPAdapter(max_retries=retry_strategy)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-    
-    try:
-        response = session.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        return response.content
-    except requests.exceptions.RequestException as e:
-        if "NameResolutionError" in str(e) or "getaddrinfo failed" in str(e):
-            from urllib.parse import urlparse, parse_qs
-            parsed = urlparse(url)
-            path = parsed.path
-            params = parse_qs(parsed.query)
-            
-            cdn_domains = [
-                "scontent-iad3-1.cdninstagram.com",
-                "scontent-iad3-2.cdninstagram.com",
-                "scontent-lga3-1.cdninstagram.com",
-                "scontent-lga3-2.cdninstagram.com",
-                "scontent-dfw5-1.cdninstagram.com",
-                "scontent-dfw5-2.cdninstagram.com"
-            ]
-            
-            for domain in cdn_domains:
-                try:
-                    alt_url = f"https://{domain}{path}?{parsed.query}"
-                    response = session.get(alt_url, headers=headers, timeout=10)
-                    response.raise_for_status()
-                    return response.content
-                except requests.exceptions.RequestException:
-                    continue
-            
-        raise
-
 def encode_image(image_data: bytes) -> str:
     """Convert image data to base64 string."""
     return base64.b64encode(image_data).decode('utf-8')
@@ -120,9 +109,8 @@ def create_copy_button(text: str, button_key: str) -> None:
             time.sleep(2)
             st.session_state.button_states[button_key] = False
 
-def display_post_card(post):
-    """Display a single Instagram post in a card format."""
-    st.markdown("""
+# Card CSS, injected once per page of cards rather than once per card
+CARD_STYLE = """
     <style>
     .post-card {
         background-color: #1E1E1E;
@@ -183,7 +171,10 @@ def display_post_card(post):
         background-color: #1E1E1E;
     }
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+def display_post_card(post):
+    """Display a single Instagram post in a card format (expects CARD_STYLE on the page)."""
 
     with st.container():
         st.markdown('<div class="post-card">', unsafe_allow_html=True)
@@ -202,8 +193,8 @@ def display_post_card(post):
 
                 if image_url:
                     try:
-                        image_data = fetch_image(image_url)
-                        image_base64 = encode_image(image_data)
+                        thumbnail = get_thumbnail_service().thumbnail(image_url)
+                        image_base64 = encode_image(thumbnail.data)
                         
                         st.markdown(f"""
                             <div style="
@@ -215,7 +206,7 @@ def display_post_card(post):
                                 background-color: #2C2C2C;
                             ">
                                 <img 
-                                    src="data:image/jpeg;base64,{image_base64}"
+                                    src="data:{thumbnail.mime};base64,{image_base64}"
                                     style="
                                         position: absolute;
                                         top: 0;
@@ -258,8 +249,8 @@ def display_post_card(post):
                     with st.expander("📸 Additional Images"):
                         for idx, img_url in enumerate(post['images'][1:], 1):
                             try:
-                                image_data = fetch_image(str(img_url))
-                                image_base64 = encode_image(image_data)
+                                thumbnail = get_thumbnail_service().thumbnail(str(img_url))
+                                image_base64 = encode_image(thumbnail.data)
                                 st.markdown(f"""
                                     <div style="
                                         width: 100%;
@@ -271,7 +262,7 @@ def display_post_card(post):
                                         margin: 10px 0;
                                     ">
                                         <img 
-                                            src="data:image/jpeg;base64,{image_base64}"
+                                            src="data:{thumbnail.mime};base64,{image_base64}"
                                             style="
                                                 position: absolute;
                                                 top: 0;
@@ -358,16 +349,48 @@ def display_post_card(post):
         
         st.markdown('</div>', unsafe_allow_html=True)
 
-def display_analytics(posts):
-    """Display analytics and insights about the scraped posts."""
+PAGE_SIZES = [10, 20, 50]
+
+# Download format choices, label -> exporters format
+EXPORT_CHOICES = {'NDJSON': 'ndjson', 'NDJSON (gzip)': 'ndjson.gz', 'CSV': 'csv'}
+
+def _set_page(page: int) -> None:
+    st.session_state.page = page
+
+def display_posts(posts):
+    """Display one page of post cards, fetching images for the visible cards only."""
+    page_size = st.session_state.setdefault('page_size', PAGE_SIZES[0])
+    page_count = max(1, -(-len(posts) // page_size))
+    page = min(st.session_state.setdefault('page', 0), page_count - 1)
+    start = page * page_size
+    visible = posts[start:start + page_size]
+
+    # Page navigation
+    col1, col2, col3, col4 = st.columns([1, 2, 1, 2])
+    with col1:
+        st.button("⬅️ Previous", disabled=page == 0, on_click=_set_page, args=(page - 1,), key="page_prev")
+    with col2:
+        st.markdown(f"Page **{page + 1}** of **{page_count}** "
+                    f"(posts {start + 1}–{start + len(visible)} of {len(posts)})")
+    with col3:
+        st.button("Next ➡️", disabled=page >= page_count - 1, on_click=_set_page, args=(page + 1,), key="page_next")
+    with col4:
+        st.selectbox("Posts per page", PAGE_SIZES, key='page_size', on_change=_set_page, args=(0,),
+                     label_visibility="collapsed")
+
+    with st.spinner("Loading images..."):
+        image_urls = post_image_urls(visible)
+        prefetch_images(image_urls)
+        get_thumbnail_service().generate(image_urls)
+
+    st.markdown(CARD_STYLE, unsafe_allow_html=True)
+    for post in visible:
+        display_post_card(post)
+
+def display_analytics(analytics: Dict):
+    """Display analytics and insights about the scraped posts (see load_analytics)."""
     st.header("📊 Analytics Overview")
     
-    # Create metrics for overall engagement
-    total_likes = sum(post.get('likesCount', 0) for post in posts)
-    total_comments = sum(post.get('commentsCount', 0) for post in posts)
-    avg_likes = total_likes // len(posts) if posts else 0
-    avg_comments = total_comments // len(posts) if posts else 0
-    
     # Display metrics in columns with a modern look
     st.markdown("""
     <style>
@@ -383,29 +406,21 @@ def display_analytics(posts):
     with st.container():
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("📝 Total Posts", len(posts))
+            st.metric("📝 Total Posts", analytics['total_posts'])
         with col2:
-            st.metric("❤️ Total Likes", f"{total_likes:,}")
+            st.metric("❤️ Total Likes", f"{analytics['total_likes']:,}")
         with col3:
-            st.metric("💬 Avg. Likes/Post", f"{avg_likes:,}")
+            st.metric("💬 Avg. Likes/Post", f"{analytics['avg_likes']:,}")
         with col4:
-            st.metric("💭 Avg. Comments/Post", f"{avg_comments:,}")
+            st.metric("💭 Avg. Comments/Post", f"{analytics['avg_comments']:,}")
 
     # Create tabs for different analytics views
     tab1, tab2 = st.tabs(["📈 Engagement Analysis", "🏷️ Hashtag Analysis"])
     
     with tab1:
         st.subheader("Post Engagement Details")
-        # Create a DataFrame for the engagement data
-        engagement_data = []
-        for post in posts:
-            engagement_data.append({
-                'Date': datetime.fromisoformat(str(post.get('timestamp')).replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M'),
-                'Likes': post.get('likesCount', 0),
-                'Comments': post.get('commentsCount', 0),
-                'URL': f"https://www.instagram.com/p/{post.get('shortCode')}/",
-                'Caption': str(post.get('caption', ''))[:100] + '...' if post.get('caption') else ''
-            })
+        # Engagement rows come precomputed from the columnar store
+        engagement_data = analytics['engagement']
         
         # Display engagement data in an interactive table
         st.dataframe(
@@ -423,33 +438,8 @@ def display_analytics(posts):
 
     with tab2:
         st.subheader("Hashtag Analysis")
-        # Create hashtag statistics
-        hashtag_stats = {}
-        for post in posts:
-            for tag in post.get('hashtags', []):
-                tag = str(tag)
-                if tag in hashtag_stats:
-                    hashtag_stats[tag]['count'] += 1
-                    hashtag_stats[tag]['total_likes'] += post.get('likesCount', 0)
-                    hashtag_stats[tag]['total_comments'] += post.get('commentsCount', 0)
-                else:
-                    hashtag_stats[tag] = {
-                        'count': 1,
-                        'total_likes': post.get('likesCount', 0),
-                        'total_comments': post.get('commentsCount', 0)
-                    }
-        
-        # Convert to list and sort by count
-        hashtag_data = [
-            {
-                'Hashtag': f"#{tag}",
-                'Usage Count': stats['count'],
-                'Avg. Likes': stats['total_likes'] // stats['count'],
-                'Avg. Comments': stats['total_comments'] // stats['count']
-            }
-            for tag, stats in hashtag_stats.items()
-        ]
-        hashtag_data.sort(key=lambda x: x['Usage Count'], reverse=True)
+        # Aggregated per hashtag on the columnar store, most used first
+        hashtag_data = analytics['hashtags']
         
         # Display hashtag data in an interactive table
         st.dataframe(
@@ -559,6 +549,11 @@ def main():
                 value=False,
                 help="Include parent post data for comments"
             )
+            only_new = st.checkbox(
+                "Only New Posts Since Last Run",
+                value=False,
+                help="Skip posts already returned by an earlier scrape"
+            )
         
         submitted = st.form_submit_button("Start Scraping")
 
@@ -587,7 +582,8 @@ def main():
             addParentData=add_parent_data,
             enhanceUserSearchWithFacebookPage=enhance_search,
             isUserReelFeedURL=is_reel_feed,
-            isUserTaggedFeedURL=is_tagged_feed
+            isUserTaggedFeedURL=is_tagged_feed,
+            onlyNew=only_new
         )
         
         with st.spinner('Scraping data... This may take a few minutes.'):
@@ -595,35 +591,85 @@ def main():
                 results = st.session_state.scraper.scrape_posts(config)
                 
                 if not results:
-                    st.warning("No data found for the provided URLs")
+                    if config.onlyNew:
+                        st.warning("No new posts since the last run")
+                    else:
+                        st.warning("No data found for the provided URLs")
                     return
                 
-                # Convert results to JSON and store for download
+                # Keep the parsed posts across reruns; widgets and page
+                # navigation rerun the script without resubmitting the form
                 json_results = [result.model_dump() for result in results]
-                st.session_state.scraped_data = json.dumps(json_results, default=str, indent=2)
+                st.session_state.posts = json_results
+                st.session_state.results_key = f"{config.fingerprint()}-{uuid.uuid4().hex}"
+                st.session_state.page = 0
                 
                 # Show success message
                 st.success(f"Successfully scraped {len(results)} posts! 🎉")
                 
-                # Display analytics
-                display_analytics(json_results)
-                
-                # Display posts in a visually appealing way
-                st.subheader("📱 Instagram Posts")
-                for post in json_results:
-                    display_post_card(post)
-                
-                # Download button
-                st.sidebar.markdown("### 💾 Export Data")
-                st.sidebar.download_button(
-                    label="📥 Download JSON",
-                    data=st.session_state.scraped_data,
-                    file_name=f"instagram_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                    mime="application/json"
-                )
-                
             except Exception as e:
                 st.error(f"An error occurred while scraping: {str(e)}")
+                return
+
+    if st.session_state.get('posts'):
+        display_results(st.session_state.posts, st.session_state.results_key)
+
+    display_metrics()
+
+def display_metrics():
+    """Sidebar panel with the scraper's counters and timings (SCRAPER_METRICS=1)."""
+    metrics = get_metrics()
+    if not metrics.enabled:
+        return
+    snapshot = metrics.snapshot()
+    with st.sidebar.expander("📊 Metrics"):
+        if snapshot['spans']:
+            st.dataframe(
+                [
+                    {'Span': name, 'Count': span['count'], 'Total (s)': round(span['total_seconds'], 2),
+                     'Mean (ms)': round(span['mean_seconds'] * 1000, 1)}
+                    for name, span in sorted(snapshot['spans'].items())
+                ],
+                hide_index=True,
+                use_container_width=True
+            )
+        for name, value in sorted(snapshot['counters'].items()):
+            st.caption(f"{name}: {value:,}")
+        st.download_button("Download JSON", data=json.dumps(snapshot, indent=2),
+                           file_name="scraper_metrics.json", mime="application/json")
+
+def display_results(posts, results_key: str):
+    """Display analytics, post cards and exports for the last scrape result."""
+    # Display analytics
+    display_analytics(load_analytics(results_key, posts))
+    
+    # Display posts in a visually appealing way, one page at a time
+    st.subheader("📱 Instagram Posts")
+    display_posts(posts)
+    
+    # Cache statistics
+    cache_stats = st.session_state.scraper.cache.stats()
+    st.sidebar.caption(
+        f"Result cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses, "
+        f"{cache_stats['entries']} entries"
+    )
+    image_stats = get_default_fetcher().cache.stats()
+    st.sidebar.caption(
+        f"Image cache: {image_stats['hit_rate']:.0%} hit rate, "
+        f"{image_stats['entries']} images ({image_stats['bytes'] / 2**20:.1f} MiB)"
+    )
+    
+    # Download button
+    st.sidebar.markdown("### 💾 Export Data")
+    export_label = st.sidebar.selectbox("Format", options=list(EXPORT_CHOICES), key='export_format')
+    export_format = EXPORT_CHOICES[export_label]
+    extension, mime = EXPORT_FORMATS[export_format]
+    st.sidebar.download_button(
+        label=f"📥 Download {export_label}",
+        data=load_export(results_key, export_format, posts),
+        file_name=f"instagram_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}",
+        mime=mime
+    )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
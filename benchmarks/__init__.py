@@ -0,0 +1 @@
+"""Offline benchmarks for the scraper pipeline; run the modules with ``python -m``."""
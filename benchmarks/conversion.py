@@ -0,0 +1,68 @@
+"""
+Item conversion throughput, with the service logging the way the app does.
+
+    python -m benchmarks.conversion --items 10000
+
+Logs go to os.devnull at INFO (the app's level), so formatting and handler
+costs are included but the terminal isn't flooded. Pass ``--log-level DEBUG``
+to measure the per-item diagnostic output.
+"""
+import argparse
+import logging
+import os
+import time
+
+from benchmarks.synthetic import make_items
+from fake_apify import FakeApifyClient
+from models import ScraperConfig
+from scraper_service import InstagramScraperService
+
+CONFIG = ScraperConfig(
+    addParentData=False,
+    directUrls=["https://www.instagram.com/benchmark/"],
+    enhanceUserSearchWithFacebookPage=False,
+    isUserReelFeedURL=False,
+    isUserTaggedFeedURL=False,
+    resultsLimit=1000,
+    resultsType="posts",
+    searchLimit=1,
+    searchType="user"
+)
+
+
+def _configure_logging(level: str):
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.FileHandler(os.devnull)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+def _rate(count: int, started: float) -> float:
+    return count / (time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+
+    items = make_items(args.items)
+    service = InstagramScraperService(api_token="benchmark")
+    _configure_logging(args.log_level)
+
+    started = time.perf_counter()
+    converted = sum(1 for item in items if service._convert_apify_to_model(item))
+    print(f"_convert_apify_to_model: {_rate(len(items), started):>10,.0f} items/s ({converted} converted)")
+
+    service.client = FakeApifyClient(items)
+    started = time.perf_counter()
+    posts = sum(1 for _ in service.iter_posts(CONFIG))
+    print(f"iter_posts:              {_rate(len(items), started):>10,.0f} items/s ({posts} posts)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Write/read speed and file size of the export formats against the app's indented JSON.
+
+    python -m benchmarks.export --items 50000
+
+"read" means loading the file back into validated ``InstagramPost`` models;
+Parquet is also timed into pandas DataFrames, which is how bulk analytics
+reads it.
+"""
+import argparse
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from pydantic import TypeAdapter
+
+from benchmarks.synthetic import generate_items
+from exporters import parquet_schemas, read_parquet, read_parquet_posts, write_ndjson, write_parquet
+from models import InstagramPost
+from scraper_service import InstagramScraperService
+
+_POSTS = TypeAdapter(List[InstagramPost])
+
+
+def _size(path: Path) -> int:
+    if path.is_dir():
+        return sum(child.stat().st_size for child in path.iterdir())
+    return path.stat().st_size
+
+
+def _timed(action):
+    started = time.perf_counter()
+    result = action()
+    return result, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=50_000)
+    args = parser.parse_args(argv)
+
+    service = InstagramScraperService(api_token="benchmark")
+    logging.getLogger("scraper_service").setLevel(logging.WARNING)
+    posts = service.convert_batch(list(generate_items(args.items)))
+    dumped = [post.model_dump() for post in posts]
+    parquet_schemas()  # Import pyarrow outside the timings
+
+    def write_json(path):
+        path.write_text(json.dumps(dumped, default=str, indent=2), encoding='utf-8')
+
+    def read_json(path):
+        return _POSTS.validate_python(json.loads(path.read_text(encoding='utf-8')))
+
+    def read_ndjson(path):
+        with open(path, 'rb') as handle:
+            return _POSTS.validate_python([json.loads(line) for line in handle])
+
+    formats = [
+        ("JSON (indent=2)", "export.json", write_json, read_json),
+        ("NDJSON", "export.ndjson", lambda path: write_ndjson(dumped, path), read_ndjson),
+        ("NDJSON (gzip)", "export.ndjson.gz", lambda path: write_ndjson(dumped, path, compress=True), None),
+        ("Parquet (zstd)", "export", lambda path: write_parquet(dumped, path), read_parquet_posts),
+    ]
+
+    print(f"{args.items:,} posts")
+    print(f"{'Format':<18} {'Size':>10} {'Write':>9} {'Read':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, filename, write, read in formats:
+            path = Path(directory) / filename
+            _, write_secs = _timed(lambda: write(path))
+            if read is not None:
+                loaded, read_secs = _timed(lambda: read(path))
+                assert len(loaded) == len(posts)
+                read_text = f"{read_secs:8.2f}s"
+            else:
+                read_text = f"{'-':>9}"
+            print(f"{name:<18} {_size(path) / 2**20:8.1f}MiB {write_secs:8.2f}s {read_text}")
+
+        (post_table, comment_table), secs = _timed(lambda: read_parquet(Path(directory) / "export"))
+        print(f"Parquet -> DataFrames: {secs:.2f}s ({len(post_table):,} posts, {len(comment_table):,} comments)")
+
+
+if __name__ == "__main__":
+    main()
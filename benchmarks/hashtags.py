@@ -0,0 +1,55 @@
+"""
+Hashtag aggregation on a large synthetic PostFrame.
+
+    python -m benchmarks.hashtags --posts 1000000
+
+The frame is generated directly with NumPy (Zipf-distributed tags, 0-15 per
+post) so the timing covers only the aggregation itself.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from analytics import PostFrame, hashtag_pairs, hashtag_stats
+
+
+def synthetic_frame(posts: int, vocabulary: int = 50_000, seed: int = 0) -> PostFrame:
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(0, 16, size=posts)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    codes = (rng.zipf(1.3, size=int(offsets[-1])) - 1) % vocabulary
+    return PostFrame(
+        short_codes=np.array([f"C{i:010d}" for i in range(posts)]),
+        likes=rng.integers(0, 100_000, size=posts),
+        comments=rng.integers(0, 5_000, size=posts),
+        timestamps=np.full(posts, np.datetime64('2024-01-01T00:00:00', 's')),
+        owner_codes=rng.integers(0, 5_000, size=posts).astype(np.int32),
+        owners=[f"user_{i}" for i in range(5_000)],
+        hashtag_codes=codes.astype(np.int32),
+        hashtag_offsets=offsets,
+        hashtags=[f"tag{i}" for i in range(vocabulary)],
+        captions=np.full(posts, '', dtype=object)
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    frame = synthetic_frame(args.posts)
+    print(f"{len(frame):,} posts, {len(frame.hashtag_codes):,} hashtag occurrences")
+
+    started = time.perf_counter()
+    stats = hashtag_stats(frame)
+    rows = stats.rows(20)
+    print(f"hashtag_stats + top 20: {time.perf_counter() - started:6.2f}s  (top: {rows[0]['Hashtag']})")
+
+    started = time.perf_counter()
+    pairs = hashtag_pairs(frame, 20)
+    print(f"hashtag_pairs top 20:   {time.perf_counter() - started:6.2f}s  (top: {pairs[0]})")
+
+
+if __name__ == "__main__":
+    main()
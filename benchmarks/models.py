@@ -0,0 +1,45 @@
+"""
+Post construction paths compared on a synthetic dataset.
+
+    python -m benchmarks.models --items 50000
+
+* per-item:  ``_convert_apify_to_model`` on each item (full validation)
+* batch:     ``convert_batch`` with one ``TypeAdapter(List[InstagramPost])`` call
+* trusted:   ``convert_batch(trusted=True)``, models constructed without validation
+"""
+import argparse
+import gc
+import logging
+import time
+
+from benchmarks.synthetic import make_items
+from scraper_service import InstagramScraperService
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=50_000)
+    args = parser.parse_args(argv)
+
+    items = make_items(args.items)
+    service = InstagramScraperService(api_token="benchmark")
+    logging.getLogger("scraper_service").setLevel(logging.WARNING)
+
+    paths = {
+        "per-item": lambda: [post for post in map(service._convert_apify_to_model, items) if post],
+        "batch": lambda: service.convert_batch(items),
+        "trusted": lambda: service.convert_batch(items, trusted=True),
+    }
+    baseline = None
+    for name, convert in paths.items():
+        gc.collect()
+        started = time.perf_counter()
+        posts = convert()
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        print(f"{name:<9} {len(items) / elapsed:>10,.0f} items/s  {elapsed:6.2f}s  "
+              f"x{baseline / elapsed:4.1f}  ({len(posts)} posts)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Memory and aggregate speed of PostFrame against the app's model_dump() dicts.
+
+    python -m benchmarks.post_frame --items 100000
+"""
+import argparse
+import gc
+import logging
+import time
+import tracemalloc
+
+from analytics import PostFrame
+from benchmarks.synthetic import generate_items
+from scraper_service import InstagramScraperService
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    service = InstagramScraperService(api_token="benchmark")
+    logging.getLogger("scraper_service").setLevel(logging.WARNING)
+    posts = service.convert_batch(list(generate_items(args.items)))
+
+    dicts, dict_bytes = _measure(lambda: [post.model_dump() for post in posts])
+    frame, frame_bytes = _measure(lambda: PostFrame.from_posts(posts))
+    print(f"model_dump dicts: {dict_bytes / 2**20:8.1f} MiB")
+    print(f"PostFrame:        {frame_bytes / 2**20:8.1f} MiB  (x{dict_bytes / frame_bytes:.0f} smaller)")
+
+    started = time.perf_counter()
+    total_likes = sum(post.get('likesCount', 0) for post in dicts)
+    total_comments = sum(post.get('commentsCount', 0) for post in dicts)
+    loop_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    assert (frame.total_likes, frame.total_comments) == (total_likes, total_comments)
+    frame_elapsed = time.perf_counter() - started
+    print(f"totals: dict loop {loop_elapsed * 1000:.1f} ms, PostFrame {frame_elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Pipeline benchmarks with stored baselines; exits 1 on a regression.
+
+    python -m benchmarks.suite                      # 1k items, compared with baselines.json
+    python -m benchmarks.suite --sizes 1k,100k,1m   # larger runs need several GB of memory
+    python -m benchmarks.suite --save               # record the current timings as the baseline
+
+Each size runs four stages on the same synthetic dataset:
+
+* convert:   ``_convert_apify_to_model`` on every item
+* scrape:    ``scrape_posts`` against ``FakeApifyClient`` (poll, page, batch convert)
+* analytics: ``dashboard_summary``, the aggregation behind the app's analytics section
+* export:    ``write_ndjson`` of the scraped posts
+
+Timings are scaled by a short pure-Python calibration loop run on both
+machines, so a baseline recorded on a laptop can gate a slower CI runner.
+A stage regresses when it is more than ``--tolerance`` slower than its
+scaled baseline; sizes without a baseline are only reported.
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from analytics import dashboard_summary
+from benchmarks.conversion import CONFIG
+from benchmarks.synthetic import make_items
+from exporters import write_ndjson
+from fake_apify import FakeApifyClient
+from scraper_service import InstagramScraperService
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+SIZES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+STAGES = ('convert', 'scrape', 'analytics', 'export')
+
+
+def calibrate(rounds: int = 3) -> float:
+    """Seconds for a fixed dict/JSON/string workload shaped like item conversion."""
+    item = make_items(1)[0]
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for index in range(5_000):
+            record = json.loads(json.dumps(item))
+            record['shortCode'] = f"C{index:010d}"
+            sorted(record)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _best_of(action: Callable[[], object], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        action()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run_size(count: int, repeat: int) -> Dict[str, float]:
+    """Best-of-``repeat`` seconds per stage for ``count`` items."""
+    items = make_items(count)
+    service = InstagramScraperService(api_token="benchmark")
+    posts: List = []
+
+    def scrape():
+        service.client = FakeApifyClient(items)
+        posts[:] = service.scrape_posts(CONFIG)
+
+    timings = {
+        'convert': _best_of(lambda: [service._convert_apify_to_model(item) for item in items], repeat),
+        'scrape': _best_of(scrape, repeat),
+    }
+    assert len(posts) == count, f"scrape_posts returned {len(posts)} of {count} posts"
+    timings['analytics'] = _best_of(lambda: dashboard_summary(posts), repeat)
+    with open(os.devnull, 'wb') as sink:
+        timings['export'] = _best_of(lambda: write_ndjson(posts, sink), repeat)
+    return timings
+
+
+def compare(results: Dict[str, Dict[str, float]], baselines: Dict, calibration: float,
+            tolerance: float) -> List[str]:
+    """Regression messages for stages slower than their scaled baseline."""
+    scale = calibration / baselines['calibration'] if baselines.get('calibration') else 1.0
+    regressions = []
+    for size, timings in results.items():
+        for stage, seconds in timings.items():
+            baseline = baselines.get('results', {}).get(size, {}).get(stage)
+            if baseline is None:
+                continue
+            expected = baseline * scale
+            if seconds > expected * (1 + tolerance):
+                regressions.append(f"{size} {stage}: {seconds:.3f}s vs {expected:.3f}s expected "
+                                   f"({seconds / expected - 1:+.0%}, tolerance {tolerance:.0%})")
+    return regressions
+
+
+def _load_baselines(path: Path) -> Dict:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def _save_baselines(path: Path, baselines: Dict, results: Dict[str, Dict[str, float]], calibration: float) -> None:
+    # Keep baselines of sizes not run this time, rescaled to the new calibration
+    scale = calibration / baselines['calibration'] if baselines.get('calibration') else 1.0
+    merged = {
+        size: {stage: round(seconds * scale, 6) for stage, seconds in timings.items()}
+        for size, timings in baselines.get('results', {}).items()
+    }
+    merged.update({size: {stage: round(seconds, 6) for stage, seconds in timings.items()}
+                   for size, timings in results.items()})
+    state = {'calibration': round(calibration, 6), 'python': platform.python_version(), 'results': merged}
+    path.write_text(json.dumps(state, indent=2) + '\n', encoding='utf-8')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1k", help=f"Comma separated sizes from {', '.join(SIZES)} (default: 1k)")
+    parser.add_argument("--repeat", type=int, default=None,
+                        help="Runs per stage, best taken (default: about 20k items' worth, at least 1)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown (default: 0.25)")
+    parser.add_argument("--baselines", type=Path, default=BASELINES_PATH)
+    parser.add_argument("--save", action="store_true", help="Store these timings as the new baseline")
+    args = parser.parse_args(argv)
+
+    sizes = [size.strip().lower() for size in args.sizes.split(',') if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes {', '.join(unknown)}; expected {', '.join(SIZES)}")
+    logging.getLogger("scraper_service").setLevel(logging.WARNING)
+
+    calibration = calibrate()
+    print(f"calibration: {calibration:.3f}s")
+    print(f"{'size':<6} " + " ".join(f"{stage:>18}" for stage in STAGES))
+    results = {}
+    for size in sizes:
+        count = SIZES[size]
+        repeat = args.repeat or max(1, min(20, 20_000 // count))
+        results[size] = run_size(count, repeat)
+        print(f"{size:<6} " + " ".join(
+            f"{results[size][stage]:>7.3f}s {count / results[size][stage]:>8,.0f}/s" for stage in STAGES
+        ))
+
+    baselines = _load_baselines(args.baselines)
+    if args.save:
+        _save_baselines(args.baselines, baselines, results, calibration)
+        print(f"Saved baselines to {args.baselines}")
+        return 0
+
+    missing = [size for size in sizes if size not in baselines.get('results', {})]
+    if missing:
+        print(f"No baseline for {', '.join(missing)}; run with --save to record one")
+    regressions = compare(results, baselines, calibration, args.tolerance)
+    for message in regressions:
+        print(f"REGRESSION {message}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
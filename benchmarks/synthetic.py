@@ -0,0 +1,91 @@
+"""
+Synthetic Apify dataset items for benchmarks and tests.
+
+Items mirror the shape of the instagram-scraper actor output: carousels,
+embedded comments, ``Z``-suffixed timestamps and a share of items with
+optional fields missing.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List
+
+_HASHTAGS = [
+    "travel", "photography", "nature", "food", "fitness", "art", "fashion", "music", "love",
+    "instagood", "photooftheday", "beautiful", "happy", "cute", "style", "summer", "sunset",
+    "nyc", "streetphotography", "cars", "supercars", "wildlife", "portrait", "coffee"
+]
+_OPTIONAL_FIELDS = ["caption", "alt", "firstComment", "latestComments", "childPosts", "images", "isSponsored"]
+_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _timestamp(rng: random.Random) -> str:
+    moment = _EPOCH + timedelta(seconds=rng.randrange(365 * 24 * 3600))
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _comment(rng: random.Random, index: int) -> Dict:
+    username = f"commenter_{rng.randrange(50_000)}"
+    return {
+        "id": str(18_000_000_000_000_000 + index),
+        "text": "Great shot! " * rng.randint(1, 4),
+        "timestamp": _timestamp(rng),
+        "owner": {
+            "id": str(rng.randrange(10 ** 10)),
+            "username": username,
+            "is_verified": rng.random() < 0.05,
+            "profile_pic_url": f"https://scontent-iad3-1.cdninstagram.com/v/t51/{username}.jpg"
+        }
+    }
+
+
+def synthetic_item(index: int, rng: random.Random, missing_rate: float = 0.1) -> Dict:
+    """Build one realistic post item; ``index`` keeps ids and short codes unique."""
+    short_code = f"C{index:010d}"
+    owner = f"user_{rng.randrange(5_000)}"
+    tags = rng.sample(_HASHTAGS, rng.randint(0, 8))
+    is_carousel = rng.random() < 0.3
+    image_count = rng.randint(2, 10) if is_carousel else 1
+    images = [
+        f"https://scontent-iad3-1.cdninstagram.com/v/t51/{short_code}_{i}.jpg?stp=dst-jpg&_nc_ht=scontent"
+        for i in range(image_count)
+    ]
+    item = {
+        "id": str(3_000_000_000_000_000_000 + index),
+        "type": "Sidecar" if is_carousel else rng.choice(["Image", "Image", "Video"]),
+        "shortCode": short_code,
+        "caption": "Synthetic caption " + " ".join(f"#{tag}" for tag in tags),
+        "hashtags": tags,
+        "mentions": [f"friend_{rng.randrange(1_000)}" for _ in range(rng.randint(0, 3))],
+        "url": f"https://www.instagram.com/p/{short_code}/",
+        "commentsCount": rng.randrange(5_000),
+        "firstComment": "First!",
+        "latestComments": [_comment(rng, index * 10 + i) for i in range(rng.randint(0, 5))],
+        "dimensionsHeight": 1350,
+        "dimensionsWidth": 1080,
+        "displayUrl": images[0],
+        "images": images,
+        "alt": "Photo by " + owner,
+        "likesCount": int(rng.paretovariate(1.2) * 50),
+        "timestamp": _timestamp(rng),
+        "childPosts": [{"id": str(index * 100 + i), "displayUrl": url} for i, url in enumerate(images[1:])],
+        "ownerFullName": owner.replace("_", " ").title(),
+        "ownerUsername": owner,
+        "ownerId": str(rng.randrange(10 ** 10)),
+        "isSponsored": rng.random() < 0.02
+    }
+    if rng.random() < missing_rate:
+        for name in rng.sample(_OPTIONAL_FIELDS, rng.randint(1, 3)):
+            item.pop(name, None)
+    return item
+
+
+def generate_items(count: int, seed: int = 0, missing_rate: float = 0.1) -> Iterator[Dict]:
+    """Lazily yield ``count`` synthetic items; the same seed yields the same items."""
+    rng = random.Random(seed)
+    for index in range(count):
+        yield synthetic_item(index, rng, missing_rate)
+
+
+def make_items(count: int, seed: int = 0, missing_rate: float = 0.1) -> List[Dict]:
+    """Materialised version of generate_items."""
+    return list(generate_items(count, seed, missing_rate))
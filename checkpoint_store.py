@@ -0,0 +1,87 @@
+"""
+Checkpoints of in-progress actor runs keyed by ScraperConfig.fingerprint().
+
+While a scrape runs, the service records the actor run and dataset it is
+reading and how many dataset items it has handed out. If the scrape fails or
+times out, a later scrape of the same config reattaches to that run instead
+of starting (and paying for) a new one.
+"""
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+
+@dataclass
+class RunCheckpoint:
+    """Where an interrupted scrape left off."""
+    key: str
+    run_id: str
+    dataset_id: str
+    offset: int
+    updated: float
+
+
+class CheckpointStore:
+    """
+    SQLite-backed run checkpoints.
+
+    Args:
+        path: SQLite database file; parent directories are created
+        max_age_seconds: Checkpoints older than this are ignored (Apify keeps
+            unnamed run datasets for a limited time)
+    """
+
+    def __init__(self, path: Union[str, Path], max_age_seconds: float = 7 * 24 * 3600):
+        self.path = Path(path)
+        self.max_age_seconds = max_age_seconds
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                "key TEXT PRIMARY KEY, run_id TEXT NOT NULL, dataset_id TEXT NOT NULL, "
+                "offset INTEGER NOT NULL, updated REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A connection per operation keeps the store usable from scrape_many threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[RunCheckpoint]:
+        """Return the checkpoint for ``key``, or None if there is none or it has expired."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT key, run_id, dataset_id, offset, updated FROM checkpoints WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        checkpoint = RunCheckpoint(*row)
+        if time.time() - checkpoint.updated > self.max_age_seconds:
+            self.delete(key)
+            return None
+        return checkpoint
+
+    def save(self, key: str, run_id: str, dataset_id: str, offset: int = 0) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (key, run_id, dataset_id, offset, updated) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, run_id, dataset_id, offset, time.time())
+            )
+
+    def delete(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM checkpoints WHERE key = ?", (key,))
+
+    def all(self) -> List[RunCheckpoint]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT key, run_id, dataset_id, offset, updated FROM checkpoints").fetchall()
+        return [RunCheckpoint(*row) for row in rows]
@@ -0,0 +1,338 @@
+"""
+Streaming exporters for scraped posts.
+
+Posts are written one at a time from any iterable (models or ``model_dump()``
+dicts), so an export never holds more than one encoded post besides the
+output itself. ``orjson`` is used for encoding when it is installed.
+
+The Parquet export is a directory with two tables: ``posts.parquet`` (one row
+per post, hashtags/mentions/images as list columns) and ``comments.parquet``
+(``latestComments`` flattened, keyed by ``shortCode``). It needs ``pyarrow``,
+which is imported only when used.
+"""
+import csv
+import gzip
+import io
+import json
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from itertools import islice
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Tuple, Union
+
+from pydantic import BaseModel, TypeAdapter
+
+from models import InstagramPost
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+Target = Union[str, Path, BinaryIO]
+
+# Format name -> (file extension, MIME type)
+EXPORT_FORMATS: Dict[str, tuple] = {
+    'ndjson': ('ndjson', 'application/x-ndjson'),
+    'ndjson.gz': ('ndjson.gz', 'application/gzip'),
+    'csv': ('csv', 'text/csv'),
+}
+
+CSV_COLUMNS = [
+    'shortCode', 'url', 'type', 'ownerUsername', 'ownerFullName', 'timestamp', 'likesCount',
+    'commentsCount', 'isSponsored', 'caption', 'hashtags', 'mentions', 'displayUrl', 'images'
+]
+
+
+def _isoformat(value: datetime) -> str:
+    """ISO 8601 with a ``Z`` suffix for UTC, as pydantic's JSON output writes it."""
+    text = value.isoformat()
+    return text[:-6] + 'Z' if text.endswith('+00:00') else text
+
+
+def _default(value: Any) -> Any:
+    """JSON fallback for values the encoders don't know (URLs, datetimes, models)."""
+    if isinstance(value, datetime):
+        return _isoformat(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(warnings=False)
+    return str(value)
+
+
+def _as_dict(post: Union[BaseModel, Dict]) -> Dict:
+    return post.model_dump(warnings=False) if isinstance(post, BaseModel) else post
+
+
+if orjson is not None:
+    def dumps(record: Dict) -> bytes:
+        """Encode one record as a compact JSON line (without the newline)."""
+        return orjson.dumps(record, default=_default, option=orjson.OPT_UTC_Z)
+
+    loads = orjson.loads
+else:
+    def dumps(record: Dict) -> bytes:
+        """Encode one record as a compact JSON line (without the newline)."""
+        return json.dumps(record, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    loads = json.loads
+
+
+@contextmanager
+def _open_target(target: Target, compress: bool = False) -> Iterator[BinaryIO]:
+    """Open a path for writing, or wrap a caller's binary file object without closing it."""
+    if isinstance(target, (str, Path)):
+        handle = open(target, 'wb')
+        owned = True
+    else:
+        handle = target
+        owned = False
+    try:
+        if compress:
+            with gzip.GzipFile(fileobj=handle, mode='wb', compresslevel=6) as compressed:
+                yield compressed
+        else:
+            yield handle
+    finally:
+        if owned:
+            handle.close()
+
+
+def write_ndjson(posts: Iterable[Union[BaseModel, Dict]], target: Target, compress: bool = False) -> int:
+    """
+    Write posts as newline-delimited JSON.
+
+    Args:
+        posts: Posts to write, consumed lazily
+        target: File path or binary file object
+        compress: Gzip the output
+
+    Returns:
+        int: Number of posts written
+    """
+    count = 0
+    with _open_target(target, compress) as handle:
+        for post in posts:
+            handle.write(dumps(_as_dict(post)))
+            handle.write(b'\n')
+            count += 1
+    return count
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return ' '.join(str(item) for item in value)
+    if isinstance(value, datetime):
+        return _isoformat(value)
+    return value
+
+
+def write_csv(posts: Iterable[Union[BaseModel, Dict]], target: Target) -> int:
+    """Write one CSV row per post with the ``CSV_COLUMNS`` fields; lists are space-separated."""
+    count = 0
+    with _open_target(target) as handle:
+        text = io.TextIOWrapper(handle, encoding='utf-8', newline='', write_through=True)
+        try:
+            writer = csv.writer(text)
+            writer.writerow(CSV_COLUMNS)
+            for post in posts:
+                post = _as_dict(post)
+                writer.writerow([_csv_value(post.get(column)) for column in CSV_COLUMNS])
+                count += 1
+        finally:
+            # Leave the underlying handle open for the caller
+            text.detach()
+    return count
+
+
+_WRITERS: Dict[str, Callable[[Iterable, Target], int]] = {
+    'ndjson': write_ndjson,
+    'ndjson.gz': lambda posts, target: write_ndjson(posts, target, compress=True),
+    'csv': write_csv,
+}
+
+
+def export_posts(posts: Iterable[Union[BaseModel, Dict]], target: Target, fmt: str = 'ndjson') -> int:
+    """Write posts to ``target`` in one of ``EXPORT_FORMATS``; returns the number written."""
+    try:
+        writer = _WRITERS[fmt]
+    except KeyError:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+    return writer(posts, target)
+
+
+def export_bytes(posts: Iterable[Union[BaseModel, Dict]], fmt: str = 'ndjson') -> bytes:
+    """Export posts into memory, e.g. for a download button."""
+    buffer = io.BytesIO()
+    export_posts(posts, buffer, fmt)
+    return buffer.getvalue()
+
+
+POSTS_TABLE = 'posts.parquet'
+COMMENTS_TABLE = 'comments.parquet'
+PARQUET_BATCH_SIZE = 10_000
+
+# Post fields stored as JSON text because their contents are free-form
+_JSON_COLUMNS = ('childPosts',)
+
+_POST_LIST_ADAPTER = TypeAdapter(List[InstagramPost])
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet export requires pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+def parquet_schemas():
+    """Arrow schemas of the posts and comments tables."""
+    pa = _pyarrow()
+    timestamp = pa.timestamp('us', tz='UTC')
+    posts = pa.schema([
+        ('inputUrl', pa.string()),
+        ('url', pa.string()),
+        ('type', pa.string()),
+        ('shortCode', pa.string()),
+        ('caption', pa.string()),
+        ('hashtags', pa.list_(pa.string())),
+        ('mentions', pa.list_(pa.string())),
+        ('commentsCount', pa.int64()),
+        ('firstComment', pa.string()),
+        ('dimensionsHeight', pa.int32()),
+        ('dimensionsWidth', pa.int32()),
+        ('displayUrl', pa.string()),
+        ('images', pa.list_(pa.string())),
+        ('alt', pa.string()),
+        ('likesCount', pa.int64()),
+        ('timestamp', timestamp),
+        ('childPosts', pa.string()),
+        ('ownerFullName', pa.string()),
+        ('ownerUsername', pa.string()),
+        ('ownerId', pa.string()),
+        ('isSponsored', pa.bool_()),
+    ])
+    comments = pa.schema([
+        ('shortCode', pa.string()),
+        ('id', pa.string()),
+        ('postId', pa.string()),
+        ('text', pa.string()),
+        ('position', pa.int32()),
+        ('timestamp', timestamp),
+        ('ownerId', pa.string()),
+        ('ownerIsVerified', pa.bool_()),
+        ('ownerUsername', pa.string()),
+        ('ownerProfilePicUrl', pa.string()),
+    ])
+    return posts, comments
+
+
+# Columns holding pydantic Url objects in model_dump() output
+_URL_COLUMNS = ('inputUrl', 'url', 'displayUrl', 'ownerProfilePicUrl')
+
+
+def _arrow_row(record: Dict) -> Dict:
+    """Shallow copy of a record with the values Arrow can't convert itself encoded."""
+    row = dict(record)
+    for name in _URL_COLUMNS:
+        value = row.get(name)
+        if value is not None and not isinstance(value, str):
+            row[name] = str(value)
+    for name in _JSON_COLUMNS:
+        if row.get(name) is not None:
+            row[name] = dumps(row[name]).decode('utf-8')
+    return row
+
+
+def _record_batch(records: List[Dict], schema):
+    # from_pylist converts in C; keys missing from the schema are ignored
+    return _pyarrow().RecordBatch.from_pylist([_arrow_row(record) for record in records], schema=schema)
+
+
+def write_parquet(posts: Iterable[Union[BaseModel, Dict]], directory: Union[str, Path],
+                  batch_size: int = PARQUET_BATCH_SIZE, compression: str = 'zstd') -> Tuple[int, int]:
+    """
+    Write posts and their latest comments as two Parquet tables.
+
+    Posts are converted ``batch_size`` at a time, so memory stays flat for
+    any number of posts.
+
+    Args:
+        posts: Posts to write, consumed lazily
+        directory: Output directory; created if missing
+        batch_size: Posts per Arrow record batch (and Parquet row group)
+        compression: Parquet compression codec
+
+    Returns:
+        Tuple[int, int]: Number of posts and comments written
+    """
+    pa = _pyarrow()
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    post_schema, comment_schema = parquet_schemas()
+    post_count = comment_count = 0
+    posts = iter(posts)
+    with pa.parquet.ParquetWriter(directory / POSTS_TABLE, post_schema, compression=compression) as post_writer, \
+            pa.parquet.ParquetWriter(directory / COMMENTS_TABLE, comment_schema, compression=compression) as comment_writer:
+        while True:
+            batch = [_as_dict(post) for post in islice(posts, batch_size)]
+            if not batch:
+                break
+            comments = [
+                {**_as_dict(comment), 'shortCode': post.get('shortCode')}
+                for post in batch for comment in post.get('latestComments') or ()
+            ]
+            post_writer.write_batch(_record_batch(batch, post_schema))
+            if comments:
+                comment_writer.write_batch(_record_batch(comments, comment_schema))
+            post_count += len(batch)
+            comment_count += len(comments)
+    return post_count, comment_count
+
+
+def parquet_parts(directory: Union[str, Path]) -> List[Path]:
+    """
+    Export directories making up a Parquet export: the directory itself, or
+    its ``part-*`` subdirectories as written by the batch CLI.
+    """
+    directory = Path(directory)
+    if (directory / POSTS_TABLE).exists():
+        return [directory]
+    return sorted(part for part in directory.glob('part-*') if (part / POSTS_TABLE).exists())
+
+
+def read_parquet(directory: Union[str, Path]):
+    """Read a Parquet export as ``(posts, comments)`` pandas DataFrames."""
+    pa = _pyarrow()
+    post_schema, comment_schema = parquet_schemas()
+    parts = parquet_parts(directory)
+    posts = pa.concat_tables([pa.parquet.read_table(part / POSTS_TABLE) for part in parts]) \
+        if parts else post_schema.empty_table()
+    comments = pa.concat_tables([pa.parquet.read_table(part / COMMENTS_TABLE) for part in parts]) \
+        if parts else comment_schema.empty_table()
+    return posts.to_pandas(), comments.to_pandas()
+
+
+def iter_parquet_records(directory: Union[str, Path], batch_size: int = PARQUET_BATCH_SIZE) -> Iterator[Dict]:
+    """Posts of a Parquet export as dicts shaped like ``InstagramPost.model_dump()``."""
+    pa = _pyarrow()
+    for part in parquet_parts(directory):
+        comments: Dict[str, List[Dict]] = {}
+        for comment in pa.parquet.read_table(part / COMMENTS_TABLE).to_pylist():
+            comments.setdefault(comment.pop('shortCode'), []).append(comment)
+
+        for batch in pa.parquet.ParquetFile(part / POSTS_TABLE).iter_batches(batch_size=batch_size):
+            for record in batch.to_pylist():
+                for name in _JSON_COLUMNS:
+                    if record[name] is not None:
+                        record[name] = loads(record[name])
+                record['latestComments'] = comments.get(record['shortCode'], [])
+                yield record
+
+
+def read_parquet_posts(directory: Union[str, Path]) -> List[InstagramPost]:
+    """Read a Parquet export back into validated post models."""
+    return _POST_LIST_ADAPTER.validate_python(list(iter_parquet_records(directory)))
@@ -0,0 +1,217 @@
+"""
+In-process stand-ins for ``ApifyClient`` and ``ApifyClientAsync`` used by the
+tests and benchmarks.
+
+The fake simulates an actor run that appends items to its dataset at a fixed
+rate on a virtual clock, so polling behaviour can be measured without
+network access or real waiting. Patch ``scraper_service.time.monotonic`` and
+``scraper_service.time.sleep`` with ``clock.monotonic`` and ``clock.sleep``
+to run the service on the same clock.
+"""
+import asyncio
+from collections import Counter
+from typing import Dict, Iterator, List, Optional
+
+
+class FakeClock:
+    """Virtual monotonic clock that only moves when something sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += max(0.0, seconds)
+
+
+class FakeRun:
+    """A simulated actor run producing ``len(items)`` items over ``duration`` seconds."""
+
+    def __init__(self, clock: FakeClock, items: List[Dict], duration: float, status: str = 'SUCCEEDED',
+                 error_message: Optional[str] = None, run_id: str = 'fake_run'):
+        self.clock = clock
+        self.id = run_id
+        self.items = items
+        self.duration = duration
+        self.final_status = status
+        self.error_message = error_message
+        self.started = clock.monotonic()
+        self.aborted = False
+
+    @property
+    def finished_at(self) -> float:
+        return self.started + self.duration
+
+    def is_finished(self) -> bool:
+        return self.aborted or self.clock.monotonic() >= self.finished_at
+
+    def available(self) -> int:
+        """Number of items written to the dataset so far."""
+        if self.is_finished() or self.duration <= 0:
+            return len(self.items)
+        progress = (self.clock.monotonic() - self.started) / self.duration
+        return int(len(self.items) * progress)
+
+    def info(self) -> Dict:
+        if self.aborted:
+            status = 'ABORTED'
+        elif self.is_finished():
+            status = self.final_status
+        else:
+            status = 'RUNNING'
+        info = {'id': self.id, 'defaultDatasetId': f"{self.id}_dataset", 'status': status}
+        if status == 'FAILED':
+            info['errorMessage'] = self.error_message or 'Unknown error'
+        return info
+
+
+class _FakeActorClient:
+    def __init__(self, client: 'FakeApifyClient'):
+        self.client = client
+
+    def start(self, run_input: Dict = None, **kwargs) -> Dict:
+        self.client.calls['actor.start'] += 1
+        self.client.run_inputs.append(run_input)
+        run = self.client.run_factory()
+        run.id = f"fake_run_{len(self.client.runs) + 1}"
+        self.client.runs[run.id] = run
+        self.client.current_run = run
+        return run.info()
+
+
+class _FakeRunClient:
+    def __init__(self, client: 'FakeApifyClient', run_id: str):
+        self.client = client
+        self.run_id = run_id
+
+    @property
+    def _run(self) -> FakeRun:
+        return self.client.runs[self.run_id]
+
+    def get(self) -> Optional[Dict]:
+        self.client.calls['run.get'] += 1
+        run = self.client.runs.get(self.run_id)
+        return run.info() if run else None  # The real client returns None for unknown runs
+
+    def wait_for_finish(self, wait_secs: Optional[int] = None) -> Dict:
+        self.client.calls['run.wait_for_finish'] += 1
+        run = self._run
+        if not run.is_finished():
+            remaining = run.finished_at - self.client.clock.monotonic()
+            wait = remaining if wait_secs is None else min(wait_secs, remaining)
+            self.client.clock.sleep(wait)
+        return run.info()
+
+    def abort(self, gracefully: bool = None) -> Dict:
+        self.client.calls['run.abort'] += 1
+        self._run.aborted = True
+        return self._run.info()
+
+
+class _FakeDatasetClient:
+    page_size = 1000  # Matches the page size iterate_items uses upstream
+
+    def __init__(self, client: 'FakeApifyClient', dataset_id: str):
+        self.client = client
+        self.run_id = dataset_id[:-len('_dataset')]
+
+    def iterate_items(self, offset: int = 0, limit: Optional[int] = None, **kwargs) -> Iterator[Dict]:
+        run = self.client.runs[self.run_id]
+        end = run.available()
+        if limit is not None:
+            end = min(end, offset + limit)
+        # One request per page, like the real client
+        for page_start in range(offset, end, self.page_size):
+            self.client.calls['dataset.page'] += 1
+            if self.client.fail_dataset_after is not None and page_start >= self.client.fail_dataset_after:
+                raise ConnectionError("Simulated dataset API failure")
+            page_end = min(page_start + self.page_size, end)
+            for item in run.items[page_start:page_end]:
+                yield item
+        if offset >= end:
+            self.client.calls['dataset.page'] += 1
+
+
+class FakeApifyClient:
+    """
+    Minimal synchronous ApifyClient replacement.
+
+    Args:
+        items: Items the simulated run writes to its dataset
+        duration: Virtual seconds the run takes to write all items
+        status: Terminal status reported once the run finishes
+        clock: Shared virtual clock; a new one is created if omitted
+
+    Set ``fail_dataset_after`` to an item offset to make dataset reads past
+    it fail, simulating a scrape that breaks partway through.
+    """
+
+    def __init__(self, items: List[Dict], duration: float = 0.0, status: str = 'SUCCEEDED',
+                 error_message: Optional[str] = None, clock: Optional[FakeClock] = None):
+        self.clock = clock or FakeClock()
+        self.calls = Counter()
+        self.run_inputs = []
+        self.run_factory = lambda: FakeRun(self.clock, items, duration, status, error_message)
+        self.runs: Dict[str, FakeRun] = {}
+        self.fail_dataset_after: Optional[int] = None
+        self.current_run: Optional[FakeRun] = None
+
+    def actor(self, actor_id: str) -> _FakeActorClient:
+        return _FakeActorClient(self)
+
+    def run(self, run_id: str) -> _FakeRunClient:
+        return _FakeRunClient(self, run_id)
+
+    def dataset(self, dataset_id: str) -> _FakeDatasetClient:
+        return _FakeDatasetClient(self, dataset_id)
+
+    @property
+    def api_calls(self) -> int:
+        """Total number of simulated HTTP requests."""
+        return sum(self.calls.values())
+
+
+class _FakeActorClientAsync(_FakeActorClient):
+    async def start(self, run_input: Dict = None, **kwargs) -> Dict:
+        await asyncio.sleep(0)
+        return super().start(run_input=run_input, **kwargs)
+
+
+class _FakeRunClientAsync(_FakeRunClient):
+    async def get(self) -> Optional[Dict]:
+        await asyncio.sleep(0)
+        return super().get()
+
+    async def wait_for_finish(self, wait_secs: Optional[int] = None) -> Dict:
+        # Yield to the event loop so callers can be cancelled mid-wait
+        await asyncio.sleep(0)
+        return super().wait_for_finish(wait_secs=wait_secs)
+
+    async def abort(self, gracefully: bool = None) -> Dict:
+        await asyncio.sleep(0)
+        return super().abort(gracefully=gracefully)
+
+
+class _FakeDatasetClientAsync(_FakeDatasetClient):
+    async def iterate_items(self, offset: int = 0, limit: Optional[int] = None, **kwargs):
+        for item in super().iterate_items(offset=offset, limit=limit, **kwargs):
+            await asyncio.sleep(0)
+            yield item
+
+
+class FakeApifyClientAsync(FakeApifyClient):
+    """Minimal ApifyClientAsync replacement sharing FakeApifyClient's simulation."""
+
+    def actor(self, actor_id: str) -> _FakeActorClientAsync:
+        return _FakeActorClientAsync(self)
+
+    def run(self, run_id: str) -> _FakeRunClientAsync:
+        return _FakeRunClientAsync(self, run_id)
+
+    def dataset(self, dataset_id: str) -> _FakeDatasetClientAsync:
+        return _FakeDatasetClientAsync(self, dataset_id)
@@ -0,0 +1,473 @@
+"""
+Image downloads for the post cards.
+
+All fetches share one pooled ``requests.Session`` so connections to the CDN
+are reused, and go through a bounded cache: an in-memory LRU plus an optional
+disk tier (``IMAGE_CACHE_DIR``). Cache keys are the URL host and path;
+Instagram re-signs the query string of the same image on every scrape.
+
+When a CDN host is unreachable the fetcher fails over to other hosts serving
+the same path. ``HostHealth`` remembers failures and latencies across calls,
+so dead hosts are skipped for a cooldown instead of timing out on every image.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+from urllib.parse import ParseResult, urlparse
+
+import requests
+
+from metrics import Metrics, get_metrics
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://www.instagram.com/'
+}
+
+CDN_FALLBACK_HOSTS = [
+    "scontent-iad3-1.cdninstagram.com",
+    "scontent-iad3-2.cdninstagram.com",
+    "scontent-lga3-1.cdninstagram.com",
+    "scontent-lga3-2.cdninstagram.com",
+    "scontent-dfw5-1.cdninstagram.com",
+    "scontent-dfw5-2.cdninstagram.com"
+]
+
+
+def build_session(max_retries: int = 3, pool_connections: int = 8, pool_maxsize: int = 32) -> requests.Session:
+    """Create a session with retries and a connection pool sized for parallel fetches."""
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+
+    # Connection and read failures are not retried on the same host: the
+    # fetcher fails over to another CDN host instead
+    retry_strategy = requests.adapters.Retry(
+        total=max_retries,
+        connect=0,
+        read=0,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"]
+    )
+
+    adapter = requests.adapters.HTTPAdapter(
+        max_retries=retry_strategy,
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def cache_key(url: str) -> str:
+    """Cache key for an image URL, ignoring its (signed, expiring) query string."""
+    parsed = urlparse(url)
+    return f"{parsed.netloc}{parsed.path}" if parsed.path not in ('', '/') else url
+
+
+class ImageCache:
+    """
+    Bounded image cache with an in-memory LRU and an optional disk tier.
+
+    Args:
+        max_items: Entries kept in memory
+        max_bytes: Total image bytes kept in memory
+        disk_dir: Directory for the disk tier; disabled when None
+        key: Maps a lookup value (a URL by default) to its cache key
+    """
+
+    def __init__(self, max_items: int = 512, max_bytes: int = 128 * 1024 * 1024,
+                 disk_dir: Optional[Union[str, Path]] = None, key: Callable[[str], str] = cache_key):
+        self.key = key
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def get(self, url: str) -> Optional[bytes]:
+        key = self.key(url)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return data
+
+        if self.disk_dir:
+            try:
+                data = self._disk_path(key).read_bytes()
+            except OSError:
+                data = None
+            if data is not None:
+                self._remember(key, data)
+                with self._lock:
+                    self.disk_hits += 1
+                return data
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, url: str, data: bytes) -> None:
+        key = self.key(url)
+        self._remember(key, data)
+        if self.disk_dir:
+            path = self._disk_path(key)
+            temp = path.with_suffix(f".{threading.get_ident()}.tmp")
+            try:
+                temp.write_bytes(data)
+                os.replace(temp, path)
+            except OSError:
+                pass
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = data
+            self._size += len(data)
+            while len(self._entries) > self.max_items or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._size
+            }
+
+
+# Failures that say something about the host rather than the image
+HOST_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+
+class _HostState:
+    __slots__ = ('latency', 'failures', 'retry_at')
+
+    def __init__(self):
+        self.latency: Optional[float] = None
+        self.failures = 0
+        self.retry_at = 0.0
+
+
+class HostHealth:
+    """
+    Failure and latency history of image hosts, shared across fetches.
+
+    A failing host is skipped for ``cooldown`` seconds, doubling with each
+    consecutive failure up to ``max_cooldown``. Available hosts are ranked by
+    consecutive failures, then by an exponentially weighted moving average of
+    their latency; untried hosts keep their configured order.
+
+    Args:
+        cooldown: Seconds a host is skipped after its first failure
+        max_cooldown: Upper bound for the growing cooldown
+        alpha: Weight of the newest sample in the latency average
+        clock: Monotonic time source
+    """
+
+    def __init__(self, cooldown: float = 30, max_cooldown: float = 300, alpha: float = 0.3,
+                 clock: Callable[[], float] = time.monotonic):
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.alpha = alpha
+        self.clock = clock
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def record_success(self, host: str, latency: float) -> None:
+        with self._lock:
+            state = self._hosts.setdefault(host, _HostState())
+            state.latency = latency if state.latency is None else (
+                self.alpha * latency + (1 - self.alpha) * state.latency
+            )
+            state.failures = 0
+            state.retry_at = 0.0
+
+    def record_failure(self, host: str) -> None:
+        with self._lock:
+            state = self._hosts.setdefault(host, _HostState())
+            state.failures += 1
+            cooldown = min(self.cooldown * 2 ** (state.failures - 1), self.max_cooldown)
+            state.retry_at = self.clock() + cooldown
+
+    def available(self, host: str) -> bool:
+        with self._lock:
+            state = self._hosts.get(host)
+            return state is None or state.retry_at <= self.clock()
+
+    def rank(self, hosts: Iterable[str]) -> List[str]:
+        """
+        Hosts worth trying, best first.
+
+        Hosts in cooldown are left out; if all of them are, the one that
+        recovers soonest is returned so a fetch is never refused outright.
+        """
+        hosts = list(dict.fromkeys(hosts))
+        now = self.clock()
+        with self._lock:
+            states = {host: self._hosts.get(host) or _HostState() for host in hosts}
+        ready = [host for host in hosts if states[host].retry_at <= now]
+        if not ready:
+            return sorted(hosts, key=lambda host: states[host].retry_at)[:1]
+        order = {host: index for index, host in enumerate(hosts)}
+        return sorted(ready, key=lambda host: (
+            states[host].failures,
+            states[host].latency if states[host].latency is not None else float('inf'),
+            order[host]
+        ))
+
+    def snapshot(self) -> Dict[str, Dict]:
+        now = self.clock()
+        with self._lock:
+            return {
+                host: {
+                    'latency': state.latency,
+                    'failures': state.failures,
+                    'cooldown': max(0.0, state.retry_at - now)
+                }
+                for host, state in self._hosts.items()
+            }
+
+
+class ImageFetcher:
+    """
+    Fetches images through a shared session and cache, with CDN fallbacks.
+
+    Args:
+        session: HTTP session; a pooled one is built if None
+        cache: Image cache; an in-memory one is created if None
+        timeout: Per-request timeout in seconds
+        cdn_hosts: Hosts (``host[:port]``) serving the same image paths
+        failure_ttl: Seconds a failed image is not retried
+        cdn_scheme: URL scheme used for fallback hosts
+        max_hosts: Hosts tried per image, including the URL's own host
+        hedged: Race the two best hosts instead of trying them in turn
+        health: Host health tracker; a new one is created if None
+        metrics: Metrics registry; the process-wide one if None
+    """
+
+    def __init__(self, session: Optional[requests.Session] = None, cache: Optional[ImageCache] = None,
+                 timeout: float = 10, cdn_hosts=None, failure_ttl: float = 60, cdn_scheme: str = "https",
+                 max_hosts: int = 3, hedged: bool = False, health: Optional[HostHealth] = None,
+                 metrics: Optional[Metrics] = None):
+        self.session = session or build_session()
+        self.cache = cache if cache is not None else ImageCache()
+        self.timeout = timeout
+        self.cdn_hosts = list(CDN_FALLBACK_HOSTS if cdn_hosts is None else cdn_hosts)
+        self.failure_ttl = failure_ttl
+        self.cdn_scheme = cdn_scheme
+        self.max_hosts = max_hosts
+        self.hedged = hedged
+        self.health = health or HostHealth()
+        self.metrics = metrics if metrics is not None else get_metrics()
+        self.network_fetches = 0
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+        # Recently failed images, so a card falls back to a link at once
+        # instead of repeating a slow failing download
+        self._failures: Dict[str, tuple] = {}
+        self._failures_lock = threading.Lock()
+
+    def fetch(self, url: str) -> bytes:
+        """Return image bytes from the cache, fetching and caching them on a miss."""
+        data = self.cache.get(url)
+        if data is not None:
+            self.metrics.inc('image_cache_hits')
+            return data
+        self.metrics.inc('image_cache_misses')
+        self._raise_recent_failure(url)
+        try:
+            data = self._download(url)
+        except Exception as e:
+            self.metrics.inc('image_failures')
+            self.record_failure(url, e)
+            raise
+        self.cache.put(url, data)
+        return data
+
+    def record_failure(self, url: str, error: Exception) -> None:
+        with self._failures_lock:
+            self._failures[cache_key(url)] = (time.monotonic(), error)
+
+    def _raise_recent_failure(self, url: str) -> None:
+        with self._failures_lock:
+            failure = self._failures.get(cache_key(url))
+            if failure is None:
+                return
+            failed_at, error = failure
+            if time.monotonic() - failed_at > self.failure_ttl:
+                del self._failures[cache_key(url)]
+                return
+        raise error
+
+    def _get(self, url: str) -> bytes:
+        self.network_fetches += 1
+        host = urlparse(url).netloc
+        started = time.monotonic()
+        try:
+            with self.metrics.span('image_download'):
+                response = self.session.get(url, timeout=self.timeout)
+        except HOST_ERRORS:
+            self.health.record_failure(host)
+            raise
+        self.health.record_success(host, time.monotonic() - started)
+        response.raise_for_status()
+        self.metrics.inc('image_bytes_downloaded', len(response.content))
+        return response.content
+
+    def _host_url(self, host: str, parsed: ParseResult) -> str:
+        query = f"?{parsed.query}" if parsed.query else ""
+        return f"{self.cdn_scheme}://{host}{parsed.path}{query}"
+
+    def candidate_urls(self, url: str) -> List[str]:
+        """URLs to try for an image, best host first, skipping hosts in cooldown."""
+        parsed = urlparse(url)
+        hosts = self.health.rank([parsed.netloc] + self.cdn_hosts)[:self.max_hosts]
+        return [url if host == parsed.netloc else self._host_url(host, parsed) for host in hosts]
+
+    def _download(self, url: str) -> bytes:
+        candidates = self.candidate_urls(url)
+        error: Optional[Exception] = None
+        if self.hedged and len(candidates) > 1:
+            try:
+                return self._race(candidates[:2])
+            except HOST_ERRORS as e:
+                error = e
+            candidates = candidates[2:]
+        for candidate in candidates:
+            try:
+                return self._get(candidate)
+            except HOST_ERRORS as e:
+                error = e
+        raise error
+
+    def _race(self, urls: List[str]) -> bytes:
+        """Request ``urls`` at once and return the first image that arrives."""
+        if self._hedge_pool is None:
+            self._hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+        pending = {self._hedge_pool.submit(self._get, url) for url in urls}
+        errors = []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # The slower request finishes in the background and
+                    # still updates its host's health
+                    return future.result()
+                errors.append(future.exception())
+        # An image-level error (e.g. 404) is more telling than a dead host
+        raise next((e for e in errors if not isinstance(e, HOST_ERRORS)), errors[-1])
+
+
+def post_image_urls(posts: Iterable[Dict]) -> List[str]:
+    """Display and carousel image URLs of dumped posts, in card order, without duplicates."""
+    urls = []
+    for post in posts:
+        if post.get('displayUrl'):
+            urls.append(str(post['displayUrl']))
+        elif post.get('images'):
+            urls.append(str(post['images'][0]))
+        urls.extend(str(url) for url in (post.get('images') or [])[1:])
+    return list(dict.fromkeys(urls))
+
+
+def prefetch_images(urls: Iterable[str], fetcher: Optional[ImageFetcher] = None, max_workers: int = 16,
+                    per_host_limit: int = 6, deadline: float = 20.0) -> Dict[str, Optional[Exception]]:
+    """
+    Download images concurrently into the fetcher's cache.
+
+    Args:
+        urls: Image URLs to warm
+        fetcher: Fetcher whose cache is filled; the default fetcher if None
+        max_workers: Total concurrent downloads
+        per_host_limit: Concurrent downloads per CDN host
+        deadline: Seconds to wait overall; unfinished downloads count as failed
+
+    Returns:
+        Dict[str, Optional[Exception]]: None for each cached image, the error otherwise
+    """
+    fetcher = fetcher or get_default_fetcher()
+    urls = list(dict.fromkeys(urls))
+    host_slots: Dict[str, threading.BoundedSemaphore] = {}
+    for url in urls:
+        host_slots.setdefault(urlparse(url).netloc, threading.BoundedSemaphore(per_host_limit))
+
+    def fetch_one(url: str) -> None:
+        with host_slots[urlparse(url).netloc]:
+            fetcher.fetch(url)
+
+    results: Dict[str, Optional[Exception]] = {}
+    if not urls:
+        return results
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+    try:
+        futures = {pool.submit(fetch_one, url): url for url in urls}
+        done, pending = wait(futures, timeout=deadline)
+        for future in done:
+            results[futures[future]] = future.exception()
+        for future in pending:
+            future.cancel()
+            error = TimeoutError(f"Image not loaded within {deadline}s")
+            fetcher.record_failure(futures[future], error)
+            results[futures[future]] = error
+    finally:
+        # Don't block the page on downloads that missed the deadline
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+_default_fetcher: Optional[ImageFetcher] = None
+_default_lock = threading.Lock()
+
+
+def get_default_fetcher() -> ImageFetcher:
+    """Process-wide fetcher; survives Streamlit reruns because modules stay imported."""
+    global _default_fetcher
+    with _default_lock:
+        if _default_fetcher is None:
+            cdn_hosts = os.getenv("IMAGE_CDN_HOSTS")
+            _default_fetcher = ImageFetcher(
+                cache=ImageCache(disk_dir=os.getenv("IMAGE_CACHE_DIR") or None),
+                cdn_hosts=[host.strip() for host in cdn_hosts.split(",") if host.strip()] if cdn_hosts else None,
+                hedged=os.getenv("IMAGE_HEDGED_FETCH", "").lower() in ("1", "true", "yes")
+            )
+        return _default_fetcher
+
+
+def fetch_image(url: str) -> bytes:
+    """
+    Fetch image data from URL with appropriate headers and retry logic.
+    """
+    return get_default_fetcher().fetch(url)
@@ -0,0 +1,249 @@
+"""
+Headless batch runner for InstagramScraperService.
+
+    python -m instagram_scraper urls.txt --output posts.ndjson
+    python -m instagram_scraper urls.txt --output posts/ --format parquet --concurrency 8
+
+URLs (one per line; blank lines and ``#`` comments are skipped) are split
+into jobs of ``--urls-per-job`` URLs that run concurrently. Each finished job
+is appended to the output and recorded in a checkpoint file, so rerunning the
+same command after a crash skips the jobs already written, and jobs that were
+interrupted reattach to their actor runs. Streamlit and pandas are never
+imported on this path.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from exporters import write_ndjson, write_parquet
+from metrics import get_metrics
+from checkpoint_store import CheckpointStore
+from models import ScraperConfig
+from result_cache import ResultCache
+from seen_index import SeenIndex
+from scraper_service import InstagramScraperService, ScrapeJobResult, split_config
+
+OUTPUT_FORMATS = ('ndjson', 'ndjson.gz', 'parquet')
+
+
+def read_urls(path: str) -> List[str]:
+    """URLs from a text file, in order and without duplicates."""
+    with open(path, encoding='utf-8') as handle:
+        urls = [line.strip() for line in handle]
+    return list(dict.fromkeys(url for url in urls if url and not url.startswith('#')))
+
+
+class BatchCheckpoint:
+    """
+    Jobs already written to the output, keyed by job config fingerprint.
+
+    For NDJSON outputs it also records the output size after the last
+    completed job; on resume the file is truncated back to it, dropping any
+    posts a crashed job had half written.
+    """
+
+    def __init__(self, path: Path, output: Path, output_format: str):
+        self.path = path
+        self.output = output
+        self.output_format = output_format
+        self.done: Dict[str, int] = {}
+        self.offset = 0
+
+    @classmethod
+    def load(cls, path: Path, output: Path, output_format: str) -> 'BatchCheckpoint':
+        checkpoint = cls(path, output, output_format)
+        if path.exists():
+            state = json.loads(path.read_text(encoding='utf-8'))
+            if state.get('output') != str(output) or state.get('format') != output_format:
+                raise ValueError(
+                    f"Checkpoint {path} belongs to {state.get('output')} ({state.get('format')}); "
+                    f"delete it or pass --restart"
+                )
+            checkpoint.done = state.get('done', {})
+            checkpoint.offset = state.get('offset', 0)
+        return checkpoint
+
+    def record(self, fingerprint: str, posts: int, offset: int = 0) -> None:
+        """Mark a job as written and persist the checkpoint atomically."""
+        self.done[fingerprint] = posts
+        self.offset = offset
+        state = {'output': str(self.output), 'format': self.output_format, 'offset': self.offset,
+                 'done': self.done}
+        temp = self.path.with_suffix(self.path.suffix + '.tmp')
+        temp.write_text(json.dumps(state, indent=1), encoding='utf-8')
+        os.replace(temp, self.path)
+
+
+class BatchWriter:
+    """Appends finished jobs to an NDJSON file or to part directories of a Parquet export."""
+
+    def __init__(self, output: Path, output_format: str, checkpoint: BatchCheckpoint):
+        self.output = output
+        self.output_format = output_format
+        self.checkpoint = checkpoint
+        self._handle = None
+        if output_format == 'parquet':
+            output.mkdir(parents=True, exist_ok=True)
+        else:
+            output.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = open(output, 'ab')
+            self._handle.truncate(checkpoint.offset)
+            self._handle.seek(checkpoint.offset)
+
+    def write(self, result: ScrapeJobResult, part: int) -> None:
+        """Append a finished job; ``part`` names its Parquet part and must be stable across resumes."""
+        if self._handle is None:
+            write_parquet(result.posts, self.output / f"part-{part:05d}")
+            offset = 0
+        else:
+            # Each job is its own gzip member; concatenated members are a valid gzip file
+            write_ndjson(result.posts, self._handle, compress=self.output_format == 'ndjson.gz')
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+            offset = self._handle.tell()
+        self.checkpoint.record(result.config.fingerprint(), len(result.posts), offset)
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+
+
+def _log(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m instagram_scraper",
+                                     description="Scrape Instagram URLs from a file without the Streamlit UI")
+    parser.add_argument("urls", help="Text file with one Instagram URL per line")
+    parser.add_argument("-o", "--output", required=True, help="Output file (NDJSON) or directory (Parquet)")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default=None,
+                        help="Output format (default: from the output name, else ndjson)")
+    parser.add_argument("--results-limit", type=int, default=200, help="Maximum posts per URL")
+    parser.add_argument("--results-type", default="posts", help="Actor results type")
+    parser.add_argument("--search-type", default="user", choices=["user", "hashtag", "place"])
+    parser.add_argument("--search-limit", type=int, default=1)
+    parser.add_argument("--urls-per-job", type=int, default=1, help="URLs sent to each actor run")
+    parser.add_argument("--concurrency", type=int, default=4, help="Actor runs in flight")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: OUTPUT.checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and output")
+    parser.add_argument("--cache", help="SQLite result cache shared with the app (optional)")
+    parser.add_argument("--seen-index", help="SQLite index of posts already scraped, shared with the app (optional)")
+    parser.add_argument("--only-new", action="store_true",
+                        help="Skip posts already in --seen-index (recurring monitoring runs)")
+    parser.add_argument("--metrics", help="Write timings and counters as JSON to this file when done")
+    parser.add_argument("--log-level", default="WARNING", help="Service log level (default: WARNING)")
+    return parser
+
+
+def _output_format(args) -> str:
+    if args.format:
+        return args.format
+    if args.output.endswith('.ndjson.gz') or args.output.endswith('.jsonl.gz'):
+        return 'ndjson.gz'
+    if args.output.endswith('.parquet') or args.output.endswith(os.sep):
+        return 'parquet'
+    return 'ndjson'
+
+
+def main(argv: Optional[List[str]] = None, service: Optional[InstagramScraperService] = None) -> int:
+    """Run the batch; returns 0 when every job succeeded, 1 otherwise."""
+    args = build_parser().parse_args(argv)
+    load_dotenv()
+    # Configured before the service, whose own basicConfig call then does nothing
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.only_new and not args.seen_index:
+        _log("--only-new needs --seen-index")
+        return 1
+    output_format = _output_format(args)
+    output = Path(args.output)
+    checkpoint_path = Path(args.checkpoint or f"{str(output).rstrip(os.sep)}.checkpoint.json")
+    # Actor runs of unfinished jobs, for reattaching on the next attempt
+    runs_path = checkpoint_path.with_suffix('.sqlite')
+    if args.restart and runs_path.exists():
+        runs_path.unlink()
+    if args.restart and checkpoint_path.exists():
+        checkpoint_path.unlink()
+        if output.is_file():
+            output.unlink()
+        for part in output.glob('part-*') if output.is_dir() else ():
+            shutil.rmtree(part)
+
+    urls = read_urls(args.urls)
+    if not urls:
+        _log(f"No URLs in {args.urls}")
+        return 1
+    config = ScraperConfig(
+        directUrls=urls,
+        resultsLimit=args.results_limit,
+        resultsType=args.results_type,
+        searchLimit=args.search_limit,
+        searchType=args.search_type,
+        addParentData=False,
+        enhanceUserSearchWithFacebookPage=False,
+        isUserReelFeedURL=False,
+        isUserTaggedFeedURL=False,
+        onlyNew=args.only_new
+    )
+    jobs = split_config(config, args.urls_per_job)
+    parts = {job.fingerprint(): index for index, job in enumerate(jobs)}
+
+    try:
+        checkpoint = BatchCheckpoint.load(checkpoint_path, output, output_format)
+    except ValueError as e:
+        _log(str(e))
+        return 1
+    pending = [job for job in jobs if job.fingerprint() not in checkpoint.done]
+    if len(pending) < len(jobs):
+        _log(f"Resuming: {len(jobs) - len(pending)} of {len(jobs)} jobs already in {output}")
+    if not pending:
+        return 0
+
+    if args.metrics:
+        get_metrics().enabled = True
+    if service is None:
+        service = InstagramScraperService(cache=ResultCache(args.cache) if args.cache else None,
+                                          checkpoints=CheckpointStore(runs_path),
+                                          seen=SeenIndex(args.seen_index) if args.seen_index else None)
+
+    writer = BatchWriter(output, output_format, checkpoint)
+    started = time.monotonic()
+    posts = failed = finished = 0
+    try:
+        for result in service.scrape_many(pending, max_concurrency=args.concurrency):
+            finished += 1
+            urls_text = ', '.join(str(url) for url in result.config.directUrls)
+            if not result.ok:
+                failed += 1
+                _log(f"[{finished}/{len(pending)}] FAILED {urls_text}: {result.error}")
+                continue
+            writer.write(result, parts[result.config.fingerprint()])
+            posts += len(result.posts)
+            elapsed = time.monotonic() - started
+            _log(f"[{finished}/{len(pending)}] {len(result.posts)} posts in {result.elapsed:.1f}s from {urls_text} "
+                 f"({posts / elapsed if elapsed else 0:,.1f} posts/s overall)")
+    finally:
+        writer.close()
+        if args.metrics:
+            Path(args.metrics).write_text(json.dumps(get_metrics().snapshot(), indent=2), encoding='utf-8')
+
+    elapsed = time.monotonic() - started
+    print(f"{finished - failed} jobs succeeded, {failed} failed, {posts:,} posts in {elapsed:.1f}s "
+          f"({posts / elapsed if elapsed else 0:,.1f} posts/s, "
+          f"{(finished - failed) / elapsed * 60 if elapsed else 0:,.1f} jobs/min)")
+    if failed:
+        print(f"Rerun the same command to retry the {failed} failed jobs")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Counters and timing spans for the scrape and image hot paths.
+
+Metrics are off unless ``SCRAPER_METRICS`` is set (or ``Metrics.enabled``
+is switched on). While disabled, ``inc`` returns at once and ``span`` hands back a
+shared no-op context manager, so instrumented code pays one attribute check
+per call site.
+
+Recorded names:
+
+* spans (seconds): ``actor_start``, ``poll_wait``, ``dataset_download``,
+  ``conversion``, ``image_download``
+* counters: ``runs_started``, ``runs_reattached``, ``polls``,
+  ``items_downloaded``, ``items_converted``, ``items_skipped``,
+  ``conversion_failures``, ``items_duplicate``, ``image_cache_hits``,
+  ``image_cache_misses``, ``image_bytes_downloaded``, ``image_failures``
+
+``snapshot()`` returns them as a JSON-ready dict and ``prometheus()`` in the
+Prometheus text format; ``serve_prometheus`` exposes the latter over HTTP
+(``SCRAPER_METRICS_PORT`` in the app).
+"""
+import os
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar('T')
+
+PROMETHEUS_PREFIX = 'instagram_scraper'
+
+DESCRIPTIONS = {
+    'actor_start': 'Starting or reattaching to an Apify actor run',
+    'poll_wait': 'Waiting on actor run status (server-side long polls)',
+    'dataset_download': 'Reading dataset items from the Apify API',
+    'conversion': 'Normalizing and validating dataset items',
+    'image_download': 'Downloading images from the CDN',
+    'runs_started': 'Actor runs started',
+    'runs_reattached': 'Checkpointed actor runs reattached to',
+    'polls': 'Actor run status polls',
+    'items_downloaded': 'Dataset items read',
+    'items_converted': 'Dataset items converted to posts',
+    'items_skipped': 'Dataset items without post data',
+    'conversion_failures': 'Dataset items that failed normalization or validation',
+    'items_duplicate': 'Dataset items dropped as duplicate or already seen',
+    'image_cache_hits': 'Images served from the image cache',
+    'image_cache_misses': 'Images not in the image cache',
+    'image_bytes_downloaded': 'Image bytes downloaded from the CDN',
+    'image_failures': 'Image fetches that failed',
+}
+
+_DISABLED_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ('metrics', 'name', 'started')
+
+    def __init__(self, metrics: 'Metrics', name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self) -> '_Span':
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+
+
+class Metrics:
+    """
+    Thread-safe registry of counters and span timings.
+
+    Args:
+        enabled: Record anything at all
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._spans: Dict[str, List[float]] = {}  # name -> [count, total, max]
+
+    def inc(self, name: str, value: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record one completed span of ``seconds``."""
+        if not self.enabled:
+            return
+        with self._lock:
+            span = self._spans.get(name)
+            if span is None:
+                self._spans[name] = [1, seconds, seconds]
+            else:
+                span[0] += 1
+                span[1] += seconds
+                span[2] = max(span[2], seconds)
+
+    def span(self, name: str):
+        """Context manager timing its block as one ``name`` span."""
+        return _Span(self, name) if self.enabled else _DISABLED_SPAN
+
+    def timed_iter(self, name: str, iterable: Iterable[T], counter: Optional[str] = None) -> Iterable[T]:
+        """
+        Wrap ``iterable`` to time how long producing its items takes (not the
+        consumer's time in between) as one ``name`` span and count the items
+        under ``counter``. Returns ``iterable`` itself while disabled.
+        """
+        if not self.enabled:
+            return iterable
+        return self._timed_iter(name, iter(iterable), counter)
+
+    def _timed_iter(self, name: str, iterator: Iterator[T], counter: Optional[str]) -> Iterator[T]:
+        count = 0
+        elapsed = 0.0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - started
+                count += 1
+                yield item
+        finally:
+            self.observe(name, elapsed)
+            if counter:
+                self.inc(counter, count)
+
+    def timed_aiter(self, name: str, iterable: AsyncIterable[T], counter: Optional[str] = None) -> AsyncIterable[T]:
+        """Async counterpart of ``timed_iter``."""
+        if not self.enabled:
+            return iterable
+        return self._timed_aiter(name, iterable.__aiter__(), counter)
+
+    async def _timed_aiter(self, name: str, iterator: AsyncIterator[T], counter: Optional[str]) -> AsyncIterator[T]:
+        count = 0
+        elapsed = 0.0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - started
+                count += 1
+                yield item
+        finally:
+            self.observe(name, elapsed)
+            if counter:
+                self.inc(counter, count)
+
+    def snapshot(self) -> Dict:
+        """Counters and spans as plain JSON-serializable values."""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'counters': dict(self._counters),
+                'spans': {
+                    name: {'count': count, 'total_seconds': total, 'max_seconds': longest,
+                           'mean_seconds': total / count if count else 0.0}
+                    for name, (count, total, longest) in self._spans.items()
+                }
+            }
+
+    def prometheus(self, prefix: str = PROMETHEUS_PREFIX) -> str:
+        """Counters and spans in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot['counters'].items()):
+            metric = f"{prefix}_{name}_total"
+            lines.append(f"# HELP {metric} {DESCRIPTIONS.get(name, name)}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        for name, span in sorted(snapshot['spans'].items()):
+            metric = f"{prefix}_{name}_seconds"
+            lines.append(f"# HELP {metric} {DESCRIPTIONS.get(name, name)}")
+            lines.append(f"# TYPE {metric} summary")
+            lines.append(f"{metric}_count {span['count']}")
+            lines.append(f"{metric}_sum {span['total_seconds']:.6f}")
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._spans.clear()
+
+
+_default_metrics: Optional[Metrics] = None
+_default_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """Process-wide registry, enabled when ``SCRAPER_METRICS`` is set to a true value."""
+    global _default_metrics
+    with _default_lock:
+        if _default_metrics is None:
+            _default_metrics = Metrics(
+                enabled=os.getenv("SCRAPER_METRICS", "").lower() in ("1", "true", "yes")
+            )
+        return _default_metrics
+
+
+def serve_prometheus(port: int, metrics: Optional[Metrics] = None, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve ``/metrics`` in the Prometheus text format from a daemon thread."""
+    metrics = metrics or get_metrics()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
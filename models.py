@@ -1,4 +1,6 @@
-from typing import List, Optional
+import hashlib
+import json
+from typing import ClassVar, List, Optional, Tuple
 from datetime import datetime
 from pydantic import BaseModel, HttpUrl
 
@@ -46,4 +48,25 @@ class ScraperConfig(BaseModel):
     resultsLimit: int
     resultsType: str
     searchLimit: int
-    searchType: str 
\ No newline at end of file
+    searchType: str
+    # Polling behaviour; these are not sent to the actor
+    maxWaitSecs: int = 180
+    minPollSecs: int = 1
+    maxPollSecs: int = 30
+    # Build posts without validation; only for data validated upstream
+    trustedItems: bool = False
+    # Skip posts a seen index has recorded from earlier scrapes
+    onlyNew: bool = False
+
+    # Fields that change what a scrape returns, as opposed to how it is polled
+    RESULT_FIELDS: ClassVar[Tuple[str, ...]] = (
+        'addParentData', 'directUrls', 'enhanceUserSearchWithFacebookPage', 'isUserReelFeedURL',
+        'isUserTaggedFeedURL', 'resultsLimit', 'resultsType', 'searchLimit', 'searchType'
+    )
+
+    def fingerprint(self) -> str:
+        """Stable hash of the result-defining fields, independent of URL order."""
+        fields = self.model_dump(mode='json', include=set(self.RESULT_FIELDS))
+        fields['directUrls'] = sorted(fields['directUrls'])
+        canonical = json.dumps(fields, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
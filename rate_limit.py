@@ -0,0 +1,244 @@
+"""
+Client-side rate limits shared by every scrape and image fetch in the process.
+
+Each budget is a token bucket: ``rate`` requests per second on average with
+bursts of at most ``burst``. Callers reserve a token and sleep until its
+slot, so concurrent callers are spaced out evenly at the ceiling instead of
+bursting into 429s. A 429 (``penalize``) blocks the whole bucket for the
+server's ``Retry-After`` and drops any saved-up burst.
+
+Budgets (``RATE_LIMIT_*`` environment variables, ``rate`` or ``rate/burst``,
+``0`` for unlimited):
+
+* ``apify_api`` (``RATE_LIMIT_APIFY_API``): every Apify API request
+* ``actor_start`` (``RATE_LIMIT_ACTOR_START``): actor runs started
+* ``cdn`` (``RATE_LIMIT_CDN``): image requests to the Instagram CDN
+"""
+import asyncio
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, Tuple
+
+# Budget -> (requests per second, burst); Apify allows 30 requests/s per resource
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    'apify_api': (20, 20),
+    'actor_start': (0.5, 4),
+    'cdn': (25, 50),
+}
+
+# Block applied on a 429 without a usable Retry-After header
+DEFAULT_RETRY_AFTER = 2.0
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header (delay seconds or an HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, moment.timestamp() - (time.time() if now is None else now))
+
+
+class TokenBucket:
+    """
+    Token bucket that paces callers rather than rejecting them.
+
+    Args:
+        rate: Tokens added per second; None or 0 for no limit
+        burst: Bucket capacity; defaults to ``rate`` (one second's worth)
+        clock: Monotonic time source
+        sleep: Blocking sleep used by ``acquire``
+    """
+
+    def __init__(self, rate: Optional[float], burst: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate or None
+        self.burst = max(burst or rate or 1, 1)
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self.waiting = 0  # Callers currently sleeping for a token
+        self.acquired = 0
+        self.delayed = 0
+        self.waited = 0.0
+        self.penalties = 0
+
+    def _refill(self, now: float) -> None:
+        # Time spent blocked by a Retry-After doesn't earn tokens
+        since = max(self._updated, self._blocked_until)
+        if self.rate is not None and now > since:
+            self._tokens = min(self.burst, self._tokens + (now - since) * self.rate)
+        self._updated = now
+
+    def _reserve(self, tokens: float) -> float:
+        """Take ``tokens`` now and return how long to sleep before using them."""
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self.acquired += 1
+            start = max(now, self._blocked_until)
+            if self.rate is None:
+                wait = start - now
+            else:
+                self._tokens -= tokens
+                wait = start - now + max(0.0, -self._tokens) / self.rate
+            if wait > 0:
+                self.waiting += 1
+                self.delayed += 1
+                self.waited += wait
+            return wait
+
+    def _remaining_block(self) -> float:
+        with self._lock:
+            return max(0.0, self._blocked_until - self.clock())
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Block until ``tokens`` may be spent; returns the seconds waited."""
+        wait = self._reserve(tokens)
+        if wait <= 0:
+            return 0.0
+        try:
+            self.sleep(wait)
+            # A 429 that arrived while sleeping pushes every reservation back
+            block = self._remaining_block()
+            while block > 0:
+                self.sleep(block)
+                wait += block
+                block = self._remaining_block()
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        return wait
+
+    async def acquire_async(self, tokens: float = 1) -> float:
+        """Async counterpart of ``acquire``."""
+        wait = self._reserve(tokens)
+        if wait <= 0:
+            return 0.0
+        try:
+            await asyncio.sleep(wait)
+            block = self._remaining_block()
+            while block > 0:
+                await asyncio.sleep(block)
+                wait += block
+                block = self._remaining_block()
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        return wait
+
+    def penalize(self, retry_after: Optional[float] = None) -> None:
+        """Hold every caller for ``retry_after`` seconds after the server rate limited us."""
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self._blocked_until = max(self._blocked_until, now + (DEFAULT_RETRY_AFTER if retry_after is None
+                                                                  else retry_after))
+            self._tokens = min(self._tokens, 0.0)
+            self.penalties += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'rate': self.rate or 0,
+                'burst': self.burst,
+                'waiting': self.waiting,
+                'acquired': self.acquired,
+                'delayed': self.delayed,
+                'waited_seconds': self.waited,
+                'penalties': self.penalties,
+                'blocked_seconds': max(0.0, self._blocked_until - self.clock()),
+            }
+
+
+class RateLimiter:
+    """
+    Named token buckets; names without a configured limit are unlimited.
+
+    Args:
+        limits: Budget name -> (rate, burst); ``DEFAULT_LIMITS`` if None
+        clock: Monotonic time source for all buckets
+        sleep: Blocking sleep for all buckets
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {
+            name: TokenBucket(rate, burst, clock, sleep)
+            for name, (rate, burst) in (DEFAULT_LIMITS if limits is None else limits).items()
+        }
+
+    def bucket(self, name: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(name)
+            if bucket is None:
+                bucket = self._buckets[name] = TokenBucket(None, None, self.clock, self.sleep)
+            return bucket
+
+    def acquire(self, name: str, tokens: float = 1) -> float:
+        return self.bucket(name).acquire(tokens)
+
+    async def acquire_async(self, name: str, tokens: float = 1) -> float:
+        return await self.bucket(name).acquire_async(tokens)
+
+    def penalize(self, name: str, retry_after: Optional[float] = None) -> None:
+        self.bucket(name).penalize(retry_after)
+
+    def queue_depth(self, name: Optional[str] = None) -> int:
+        """Callers waiting for a token in one budget, or in all of them."""
+        if name is not None:
+            return self.bucket(name).waiting
+        with self._lock:
+            return sum(bucket.waiting for bucket in self._buckets.values())
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {name: bucket.stats() for name, bucket in buckets.items()}
+
+
+def _parse_limit(value: str, default: Tuple[float, float]) -> Tuple[Optional[float], Optional[float]]:
+    """``"rate"`` or ``"rate/burst"``; ``"0"``/``"off"`` disables the budget."""
+    value = value.strip().lower()
+    if not value:
+        return default
+    if value in ("0", "off", "none"):
+        return None, None
+    rate, _, burst = value.partition("/")
+    return float(rate), float(burst) if burst else None
+
+
+def limits_from_env() -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+    """``DEFAULT_LIMITS`` overridden by ``RATE_LIMIT_<NAME>`` environment variables."""
+    return {
+        name: _parse_limit(os.getenv(f"RATE_LIMIT_{name.upper()}", ""), default)
+        for name, default in DEFAULT_LIMITS.items()
+    }
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide limiter shared by all scraper services and image fetchers."""
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter(limits_from_env())
+        return _default_limiter
@@ -0,0 +1,118 @@
+"""
+Persistent cache of scrape results keyed by ScraperConfig.fingerprint().
+
+Results are stored zlib-compressed in a single SQLite file with a TTL and a
+total size budget; the least recently used entries are evicted first.
+"""
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+from pydantic import TypeAdapter
+
+from models import InstagramPost
+
+_POSTS_ADAPTER = TypeAdapter(List[InstagramPost])
+
+
+class ResultCache:
+    """
+    On-disk LRU cache of scraped posts.
+
+    Args:
+        path: SQLite database file; parent directories are created
+        ttl_seconds: Entries older than this are treated as misses
+        max_bytes: Total compressed size kept before evicting LRU entries
+    """
+
+    def __init__(self, path: Union[str, Path], ttl_seconds: float = 3600, max_bytes: int = 256 * 1024 * 1024):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, created REAL NOT NULL, accessed REAL NOT NULL, "
+                "size INTEGER NOT NULL, payload BLOB NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A connection per operation keeps the cache usable from scrape_many threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Optional[List[InstagramPost]]:
+        """Return the cached posts for ``key``, or None on a miss or expired entry."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT created, payload FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._count(hit=False)
+                return None
+            created, payload = row
+            if now - created > self.ttl_seconds:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._count(hit=False)
+                return None
+            conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+        self._count(hit=True)
+        return _POSTS_ADAPTER.validate_json(zlib.decompress(payload))
+
+    def put(self, key: str, posts: List[InstagramPost]) -> None:
+        """Store ``posts`` under ``key`` and evict old entries over the size budget."""
+        payload = zlib.compress(_POSTS_ADAPTER.dump_json(posts, warnings=False), 6)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, created, accessed, size, payload) VALUES (?, ?, ?, ?, ?)",
+                (key, now, now, len(payload), payload)
+            )
+            conn.execute("DELETE FROM results WHERE created < ?", (now - self.ttl_seconds,))
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY accessed").fetchall():
+            conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results")
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Hit/miss counters and current size."""
+        with self._connect() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+            'bytes': size
+        }
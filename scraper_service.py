@@ -1,21 +1,194 @@
-from typing import List, Optional, Dict
-from models import InstagramPost, ScraperConfig
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+from models import InstagramComment, InstagramPost, ScraperConfig
+from pydantic import TypeAdapter, ValidationError
+from checkpoint_store import CheckpointStore, RunCheckpoint
+from metrics import Metrics, get_metrics
+from rate_limit import RateLimiter, get_rate_limiter
+from result_cache import ResultCache
+from seen_index import SeenIndex
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+import asyncio
 import logging
+import math
 import time
 import os
 from datetime import datetime
-from apify_client import ApifyClient
+from apify_client import ApifyClient, ApifyClientAsync
 from dotenv import load_dotenv
 from pathlib import Path
 
-class InstagramScraperService:
-    def __init__(self, api_token: str = None):
-        """Initialize the Instagram scraper with API token."""
+# Actor run statuses after which no more dataset items will be written
+TERMINAL_STATUSES = {'SUCCEEDED', 'FAILED', 'TIMED-OUT', 'ABORTED'}
+
+# Dataset items converted per validation call; matches the dataset page size
+CONVERSION_BATCH_SIZE = 1000
+
+# Checkpointed runs in these states have nothing more to give
+UNRESUMABLE_STATUSES = {'FAILED', 'ABORTED'}
+
+# Items per API request made by the Apify client's iterate_items
+DATASET_PAGE_SIZE = 1000
+
+@dataclass
+class ScrapeJobResult:
+    """Outcome of a single job submitted to InstagramScraperService.scrape_many."""
+    index: int
+    config: ScraperConfig
+    posts: List[InstagramPost] = field(default_factory=list)
+    error: Optional[Exception] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def split_config(config: ScraperConfig, urls_per_job: int = 1) -> List[ScraperConfig]:
+    """Split a multi-URL config into jobs of at most ``urls_per_job`` URLs each."""
+    urls = list(config.directUrls)
+    return [
+        config.model_copy(update={'directUrls': urls[start:start + urls_per_job]})
+        for start in range(0, len(urls), urls_per_job)
+    ]
+
+
+# Validates a whole batch of posts in a single pydantic-core call
+_POST_LIST_ADAPTER = TypeAdapter(List[InstagramPost])
+
+
+_POST_FIELDS = frozenset(InstagramPost.model_fields)
+_COMMENT_FIELDS = frozenset(InstagramComment.model_fields)
+
+
+def _construct_trusted(model_class, values: Dict, fields_set: frozenset):
+    """
+    Equivalent of ``model_class.model_construct(**values)`` for models with
+    no defaults, aliases, extras or private attributes, minus its per-field
+    Python loop.
+    """
+    instance = model_class.__new__(model_class)
+    object.__setattr__(instance, '__dict__', values)
+    object.__setattr__(instance, '__pydantic_fields_set__', set(fields_set))
+    object.__setattr__(instance, '__pydantic_extra__', None)
+    object.__setattr__(instance, '__pydantic_private__', None)
+    return instance
+
+
+def _construct_post(fields: Dict) -> InstagramPost:
+    """Build a post from trusted, already-normalized fields without validation."""
+    comments = []
+    for comment in fields['latestComments']:
+        timestamp = comment['timestamp']
+        if isinstance(timestamp, str) and timestamp:
+            comment = dict(comment, timestamp=datetime.fromisoformat(timestamp.replace('Z', '+00:00')))
+        comments.append(_construct_trusted(InstagramComment, comment, _COMMENT_FIELDS))
+    fields['latestComments'] = comments
+    return _construct_trusted(InstagramPost, fields, _POST_FIELDS)
+
+
+@dataclass
+class ConversionStats:
+    """Aggregate counters for a batch of converted dataset items."""
+    items: int = 0
+    converted: int = 0
+    skipped: int = 0
+    failed: int = 0
+    duplicates: int = 0  # Dropped before conversion, so not part of ``items``
+    last_error: Optional[str] = None
+
+
+class RunPoller:
+    """
+    Adaptive wait strategy for an in-progress Apify actor run.
+
+    Waits are server-side long polls (``waitForFinish``), so a run that
+    finishes mid-wait is reported immediately instead of after a sleep. The
+    interval halves while polls return at least ``target_batch`` items (one
+    dataset page by default) and doubles while the dataset is idle or
+    trickling, up to ``max_interval``.
+    """
+
+    def __init__(self, run_client, max_wait_secs: int = 180, min_interval: int = 1, max_interval: int = 30,
+                 target_batch: int = 1000):
+        self.run_client = run_client
+        self.max_wait_secs = max_wait_secs
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_batch = target_batch
+        self.interval = 0  # The first check returns straight away
+        self.polls = 0
+        self.started = time.monotonic()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def expired(self) -> bool:
+        return self.elapsed() >= self.max_wait_secs
+
+    def _next_wait(self) -> int:
+        remaining = self.max_wait_secs - self.elapsed()
+        return max(0, min(self.interval, math.ceil(remaining)))
+
+    def _begin_wait(self) -> int:
+        """Check the deadline, count the poll and return how long to wait for."""
+        if self.expired():
+            raise TimeoutError(f"Dataset retrieval timed out after {self.elapsed():.0f} seconds")
+        self.polls += 1
+        return self._next_wait()
+
+    def wait(self) -> Dict:
+        """Wait up to the current interval for the run to finish and return its info."""
+        return self.run_client.wait_for_finish(wait_secs=self._begin_wait()) or {}
+
+    def sleep(self) -> None:
+        """Sleep for the current interval without exceeding the deadline."""
+        time.sleep(max(self._next_wait(), self.min_interval))
+
+    def record(self, new_items: int) -> None:
+        """Adapt the interval to whether the last poll produced new items."""
+        if new_items >= self.target_batch:
+            self.interval = max(self.interval // 2, self.min_interval)
+        else:
+            self.interval = min(max(self.interval * 2, self.min_interval), self.max_interval)
+
+
+class AsyncRunPoller(RunPoller):
+    """RunPoller for ``ApifyClientAsync`` run clients."""
+
+    async def wait(self) -> Dict:
+        return await self.run_client.wait_for_finish(wait_secs=self._begin_wait()) or {}
+
+    async def sleep(self) -> None:
+        await asyncio.sleep(max(self._next_wait(), self.min_interval))
+
+
+class _ScraperServiceBase:
+    """Shared setup and item conversion for the sync and async scraper services."""
+
+    def __init__(self, api_token: str = None, cache: Optional[ResultCache] = None,
+                 checkpoints: Optional[CheckpointStore] = None, seen: Optional[SeenIndex] = None,
+                 metrics: Optional[Metrics] = None, limiter: Optional[RateLimiter] = None):
+        """
+        Initialize the Instagram scraper with API token and optional stores: a
+        result cache, run checkpoints and an index of posts already delivered.
+        Timings and counters go to ``metrics`` and API calls are paced by
+        ``limiter`` (the process-wide ones by default).
+        """
         self._setup_logging()
+        self.cache = cache
+        self.checkpoints = checkpoints
+        self.seen = seen
+        self.metrics = metrics if metrics is not None else get_metrics()
+        self.limiter = limiter if limiter is not None else get_rate_limiter()
         self.api_token = api_token or os.getenv("APIFY_API_TOKEN")
         if not self.api_token:
             raise ValueError("Apify API token is required")
-        self.client = ApifyClient(self.api_token)
+        self.client = self._create_client()
+
+    def _create_client(self):
+        """Create the Apify client used by this service."""
+        raise NotImplementedError
 
     def _setup_logging(self):
         """Set up logging configuration."""
@@ -25,6 +198,292 @@ class InstagramScraperService:
         )
         self.logger = logging.getLogger(__name__)
 
+    def _cached_posts(self, config: ScraperConfig) -> Optional[List[InstagramPost]]:
+        """Return cached posts for an identical earlier scrape, if any."""
+        # "Only new" results depend on the seen index, not just the config
+        if self.cache is None or config.onlyNew:
+            return None
+        posts = self.cache.get(config.fingerprint())
+        if posts is not None:
+            self.logger.info(f"Serving {len(posts)} cached posts for config {config.fingerprint()[:12]}")
+        return posts
+
+    def _store_posts(self, config: ScraperConfig, posts: List[InstagramPost]) -> None:
+        if self.cache is not None and not config.onlyNew:
+            self.cache.put(config.fingerprint(), posts)
+
+    def _new_items(self, items: List[Dict], config: ScraperConfig, seen_in_run: set,
+                   stats: ConversionStats) -> List[Dict]:
+        """
+        Drop items whose shortCode was already handed out in this run and, in
+        "only new" mode, those the seen index has from earlier runs.
+        """
+        fresh = []
+        for item in items:
+            short_code = item.get('shortCode')
+            if short_code is not None:
+                if short_code in seen_in_run:
+                    continue
+                seen_in_run.add(short_code)
+            fresh.append(item)
+        if config.onlyNew and self.seen is not None and fresh:
+            known = self.seen.known(item['shortCode'] for item in fresh if item.get('shortCode') is not None)
+            if known:
+                fresh = [item for item in fresh if item.get('shortCode') not in known]
+        stats.duplicates += len(items) - len(fresh)
+        self.metrics.inc('items_duplicate', len(items) - len(fresh))
+        return fresh
+
+    def _mark_seen(self, posts: List[InstagramPost]) -> None:
+        if self.seen is not None and posts:
+            self.seen.add(post.shortCode for post in posts)
+
+    def _batch_handed_out(self, config: ScraperConfig, run_id: str, dataset_id: str, offset: int,
+                          posts: List[InstagramPost], mark_seen: bool) -> None:
+        """Checkpoint the offset and record the posts once the consumer has taken a whole batch."""
+        self._save_checkpoint(config, run_id, dataset_id, offset)
+        if mark_seen:
+            self._mark_seen(posts)
+
+    def _paced_items(self, items: Iterable[Dict]) -> Iterator[Dict]:
+        """Take an Apify API token before each dataset page ``items`` will request."""
+        self.limiter.acquire('apify_api')
+        for count, item in enumerate(items, 1):
+            yield item
+            if count % DATASET_PAGE_SIZE == 0:
+                self.limiter.acquire('apify_api')
+
+    async def _paced_aitems(self, items) -> AsyncIterator[Dict]:
+        """Async counterpart of ``_paced_items``."""
+        await self.limiter.acquire_async('apify_api')
+        count = 0
+        async for item in items:
+            yield item
+            count += 1
+            if count % DATASET_PAGE_SIZE == 0:
+                await self.limiter.acquire_async('apify_api')
+
+    def _rate_limited(self, error: Exception) -> None:
+        """Back all API callers off after Apify answered 429 (its errors don't carry Retry-After)."""
+        if getattr(error, 'status_code', None) == 429:
+            self.limiter.penalize('apify_api')
+
+    def _saved_run(self, config: ScraperConfig) -> Optional[RunCheckpoint]:
+        """Checkpoint of an earlier, unfinished scrape of the same config, if any."""
+        if self.checkpoints is None:
+            return None
+        return self.checkpoints.get(config.fingerprint())
+
+    def _can_reattach(self, checkpoint: RunCheckpoint, run_info: Optional[Dict]) -> bool:
+        """Whether a checkpointed run can still be read; forgets the checkpoint if not."""
+        status = run_info.get('status') if run_info else 'MISSING'
+        if status not in UNRESUMABLE_STATUSES and status != 'MISSING':
+            self.logger.info(f"Reattaching to actor run {checkpoint.run_id} ({status}), "
+                             f"{checkpoint.offset} items consumed before")
+            return True
+        self.logger.info(f"Checkpointed actor run {checkpoint.run_id} is {status}; starting a new run")
+        self.checkpoints.delete(checkpoint.key)
+        return False
+
+    def _save_checkpoint(self, config: ScraperConfig, run_id: str, dataset_id: str, offset: int) -> None:
+        if self.checkpoints is not None:
+            self.checkpoints.save(config.fingerprint(), run_id, dataset_id, offset)
+
+    def _clear_checkpoint(self, config: ScraperConfig) -> None:
+        if self.checkpoints is not None:
+            self.checkpoints.delete(config.fingerprint())
+
+    def _started_run(self, config: ScraperConfig, run: Optional[Dict]) -> Tuple[str, str]:
+        """Record a newly started run and return its run and dataset IDs."""
+        if not run:
+            raise Exception("Failed to start Apify actor run")
+
+        run_id = run.get('id')
+        dataset_id = run.get('defaultDatasetId')
+
+        self.logger.info(f"Actor run started. Run ID: {run_id}, Dataset ID: {dataset_id}")
+        self._save_checkpoint(config, run_id, dataset_id, 0)
+        return run_id, dataset_id
+
+    def _build_run_input(self, config: ScraperConfig) -> Dict:
+        """Prepare the Actor input from a scraping configuration."""
+        return {
+            "directUrls": [str(url) for url in config.directUrls],
+            "resultsType": config.resultsType,
+            "resultsLimit": config.resultsLimit,
+            "searchType": config.searchType,
+            "searchLimit": config.searchLimit,
+            "addParentData": config.addParentData
+        }
+
+    def convert_batch(self, items: List[Dict], trusted: bool = False,
+                      stats: Optional[ConversionStats] = None) -> List[InstagramPost]:
+        """
+        Convert a list of dataset items to posts in one validation pass.
+
+        Args:
+            items (List[Dict]): Raw Apify dataset items
+            trusted (bool): Skip pydantic validation and construct the models
+                directly. Only for data already validated upstream; URL fields
+                are kept as plain strings, so dump them with ``warnings=False``.
+            stats (ConversionStats, optional): Counters to update
+
+        Returns:
+            List[InstagramPost]: Converted posts, in input order
+        """
+        stats = stats if stats is not None else ConversionStats()
+        stats.items += len(items)
+        skipped, failed = stats.skipped, stats.failed
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+
+        with self.metrics.span('conversion'):
+            fields = []
+            for position, item in enumerate(items):
+                try:
+                    post_fields = self._normalize_item(item, debug)
+                except Exception as e:
+                    stats.failed += 1
+                    stats.last_error = str(e)
+                    if debug:
+                        self.logger.debug("Error normalizing item %d: %s", position, e, exc_info=True)
+                    continue
+                if post_fields is None:
+                    stats.skipped += 1
+                else:
+                    fields.append(post_fields)
+
+            if trusted:
+                posts = [_construct_post(post_fields) for post_fields in fields]
+            else:
+                try:
+                    posts = _POST_LIST_ADAPTER.validate_python(fields)
+                except ValidationError as e:
+                    # Drop the invalid entries and validate the rest again
+                    invalid = {error['loc'][0] for error in e.errors() if error['loc']}
+                    stats.failed += len(invalid)
+                    stats.last_error = str(e.errors()[0]['msg']) if e.errors() else str(e)
+                    if debug:
+                        self.logger.debug("Dropping %d items that failed validation: %s", len(invalid), e)
+                    posts = _POST_LIST_ADAPTER.validate_python(
+                        [post_fields for index, post_fields in enumerate(fields) if index not in invalid]
+                    )
+
+        stats.converted += len(posts)
+        if self.metrics.enabled:
+            self.metrics.inc('items_converted', len(posts))
+            self.metrics.inc('items_skipped', stats.skipped - skipped)
+            self.metrics.inc('conversion_failures', stats.failed - failed)
+        return posts
+
+    def _log_batch(self, stats: ConversionStats) -> None:
+        """Log one summary line for a batch of converted items."""
+        if stats.duplicates:
+            self.logger.info("Dropped %d duplicate or already seen items", stats.duplicates)
+        if not stats.items:
+            return
+        self.logger.info(
+            "Converted %d/%d items (%d skipped, %d failed)",
+            stats.converted, stats.items, stats.skipped, stats.failed
+        )
+        if stats.failed:
+            self.logger.warning("%d items failed conversion; last error: %s", stats.failed, stats.last_error)
+
+    def _convert_apify_to_model(self, item: Dict) -> Optional[InstagramPost]:
+        """Convert Apify output to InstagramPost model."""
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        try:
+            post_fields = self._normalize_item(item, debug)
+            if post_fields is None:
+                return None
+            return InstagramPost(**post_fields)
+
+        except Exception as e:
+            self.logger.error(f"Error converting item to model: {str(e)}", exc_info=True)
+            if debug:
+                self.logger.debug("Problematic item: %s", item)
+            return None
+
+    def _normalize_item(self, item: Dict, debug: bool = False) -> Optional[Dict]:
+        """Map an Apify item onto InstagramPost fields, or None if it has no shortCode."""
+        if debug:
+            self.logger.debug("Raw item keys: %s", list(item.keys()))
+            self.logger.debug("Processing item with URL: %s and type: %s", item.get('url', 'No URL'), item.get('type', 'No type'))
+
+        # Handle timestamp format
+        timestamp_str = item.get('timestamp')
+        if timestamp_str:
+            if timestamp_str.endswith('Z'):
+                timestamp_str = timestamp_str[:-1] + '+00:00'
+            timestamp = datetime.fromisoformat(timestamp_str)
+        else:
+            timestamp = datetime.now()
+            self.logger.debug("No timestamp found, using current time")
+
+        # Extract comments from the response
+        latest_comments = []
+        post_id = item.get('id', '')
+        for position, comment in enumerate(item.get('latestComments') or ()):
+            owner = comment.get('owner') or {}
+            latest_comments.append({
+                'id': comment.get('id', ''),
+                'text': comment.get('text', ''),
+                'timestamp': comment.get('timestamp', ''),
+                'ownerId': owner.get('id', ''),
+                'ownerUsername': owner.get('username', ''),
+                'ownerIsVerified': owner.get('is_verified', False),
+                'ownerProfilePicUrl': owner.get('profile_pic_url', ''),
+                'postId': post_id,  # Add the post ID
+                'position': position  # Add the position
+            })
+
+        # Adjust URL handling - check if we have a shortCode
+        shortCode = item.get('shortCode')
+        if not shortCode:
+            shortCode = item.get('url', '').split('/')[-2] if item.get('url') else ''
+            self.logger.debug("Extracted shortCode from URL: %s", shortCode)
+
+        if not shortCode:
+            self.logger.debug("Skipping item without shortCode: %s", item.get('url', 'No URL'))
+            return None
+
+        if debug:
+            self.logger.debug(
+                "Item %s: %d comments, caption length %d, %d images, timestamp %s",
+                shortCode, len(latest_comments), len(item.get('caption') or ''),
+                len(item.get('images') or ()), timestamp
+            )
+
+        # Map onto InstagramPost fields with flexible source names
+        return {
+            'inputUrl': item.get('url', item.get('inputUrl', '')),  # Try both url and inputUrl
+            'url': f"https://www.instagram.com/p/{shortCode}/",
+            'type': item.get('type', item.get('mediaType', 'Image')),  # Try both type and mediaType
+            'shortCode': shortCode,
+            'caption': item.get('caption', item.get('text', '')),  # Try both caption and text
+            'hashtags': item.get('hashtags', []),
+            'mentions': item.get('mentions', []),
+            'commentsCount': item.get('commentsCount', 0),
+            'firstComment': item.get('firstComment', ''),
+            'latestComments': latest_comments,
+            'dimensionsHeight': item.get('dimensionsHeight', item.get('height', 0)),  # Try both formats
+            'dimensionsWidth': item.get('dimensionsWidth', item.get('width', 0)),
+            'displayUrl': item.get('displayUrl', item.get('imageUrl', '')),  # Try both formats
+            'images': item.get('images', [item.get('displayUrl')] if item.get('displayUrl') else []),
+            'alt': item.get('alt', item.get('accessibility_caption', '')),  # Try both formats
+            'likesCount': item.get('likesCount', 0),
+            'timestamp': timestamp,
+            'childPosts': item.get('childPosts', []),
+            'ownerFullName': item.get('ownerFullName', item.get('fullName', '')),  # Try both formats
+            'ownerUsername': item.get('ownerUsername', item.get('username', '')),
+            'ownerId': item.get('ownerId', item.get('userId', '')),
+            'isSponsored': item.get('isSponsored', False)
+        }
+
+
+class InstagramScraperService(_ScraperServiceBase):
+    def _create_client(self) -> ApifyClient:
+        return ApifyClient(self.api_token)
+
     def scrape_posts(self, config: ScraperConfig) -> List[InstagramPost]:
         """
         Scrape Instagram posts using Apify API.
@@ -36,172 +495,337 @@ class InstagramScraperService:
             List[InstagramPost]: List of scraped posts
         """
         try:
-            # Prepare the Actor input
-            run_input = {
-                "directUrls": [str(url) for url in config.directUrls],
-                "resultsType": config.resultsType,
-                "resultsLimit": config.resultsLimit,
-                "searchType": config.searchType,
-                "searchLimit": config.searchLimit,
-                "addParentData": config.addParentData
-            }
-
-            self.logger.info(f"Starting Apify scraper with input: {run_input}")
-            
-            # Run the Actor and wait for it to finish
-            run = self.client.actor("your_actor_id").call(run_input=run_input)
-            
-            if not run:
-                raise Exception("Failed to start Apify actor run")
-                
-            run_id = run.get('id')
-            dataset_id = run.get('defaultDatasetId')
-            
-            self.logger.info(f"Actor run started. Run ID: {run_id}, Dataset ID: {dataset_id}")
-            
-            # Wait for the dataset to be ready (with timeout)
-            max_wait_time = 180  # Maximum wait time in seconds
-            wait_start = time.time()
-            
+            posts = self._cached_posts(config)
+            if posts is not None:
+                return posts
+
+            # Posts count as seen only once the whole scrape has been delivered
+            posts = list(self.iter_posts(config, mark_seen=False))
+            self.logger.info(f"Successfully scraped {len(posts)} posts")
+            self._store_posts(config, posts)
+            self._mark_seen(posts)
+            return posts
+
+        except Exception as e:
+            self.logger.error(f"Error running Apify scraper: {str(e)}", exc_info=True)
+            raise
+
+    def scrape_many(self, configs: Iterable[ScraperConfig], max_concurrency: int = 4) -> Iterator[ScrapeJobResult]:
+        """
+        Run several scrape jobs concurrently on a bounded thread pool.
+
+        A failing job does not affect the others; its exception is reported on
+        its result instead of being raised.
+
+        Args:
+            configs (Iterable[ScraperConfig]): One configuration per job
+            max_concurrency (int): Maximum number of actor runs in flight
+
+        Yields:
+            ScrapeJobResult: Per-job results, in order of completion
+        """
+        configs = list(configs)
+        self.logger.info(f"Running {len(configs)} scrape jobs with concurrency {max_concurrency}")
+        pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="scrape")
+        futures = [pool.submit(self._run_job, index, config) for index, config in enumerate(configs)]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # Don't start queued jobs if the caller stops consuming early
+            for future in futures:
+                future.cancel()
+            pool.shutdown(wait=True)
+
+    def _run_job(self, index: int, config: ScraperConfig) -> ScrapeJobResult:
+        """Scrape one job for scrape_many, capturing any error on the result."""
+        started = time.monotonic()
+        result = ScrapeJobResult(index=index, config=config)
+        try:
+            result.posts = self.scrape_posts(config)
+        except Exception as e:
+            result.error = e
+        result.elapsed = time.monotonic() - started
+        return result
+
+    def _start_run(self, config: ScraperConfig) -> Tuple[str, str, int]:
+        """
+        Reattach to a checkpointed run of ``config`` or start a new one.
+
+        Returns:
+            Tuple[str, str, int]: Run ID, dataset ID and the checkpointed offset
+        """
+        checkpoint = self._saved_run(config)
+        if checkpoint:
+            self.limiter.acquire('apify_api')
+        if checkpoint and self._can_reattach(checkpoint, self.client.run(checkpoint.run_id).get()):
+            self.metrics.inc('runs_reattached')
+            return checkpoint.run_id, checkpoint.dataset_id, checkpoint.offset
+
+        run_input = self._build_run_input(config)
+
+        self.logger.info(f"Starting Apify scraper with input: {run_input}")
+
+        # Start the Actor without blocking so items can be consumed while it runs
+        self.limiter.acquire('actor_start')
+        self.limiter.acquire('apify_api')
+        run = self.client.actor("your_actor_id").start(run_input=run_input)
+        run_id, dataset_id = self._started_run(config, run)
+        self.metrics.inc('runs_started')
+        return run_id, dataset_id, 0
+
+    def iter_posts(self, config: ScraperConfig, resume: bool = False, mark_seen: bool = True) -> Iterator[InstagramPost]:
+        """
+        Stream Instagram posts from an Apify actor run as its dataset grows.
+
+        Each poll only fetches the items appended since the previous one, so
+        memory stays flat no matter how large the run gets. With a checkpoint
+        store, an unfinished run of the same config is reattached to instead
+        of starting a new one, and the number of items handed out is saved
+        after every batch.
+
+        Items repeating a shortCode already handed out are dropped before
+        conversion, as are (with ``config.onlyNew``) posts in the seen index.
+
+        Args:
+            config (ScraperConfig): Scraping configuration
+            resume (bool): Continue after the items a previous, interrupted
+                consumer already received instead of from the beginning
+            mark_seen (bool): Add each handed-out batch to the seen index
+
+        Yields:
+            InstagramPost: Converted posts, in dataset order
+        """
+        with self.metrics.span('actor_start'):
+            run_id, dataset_id, saved_offset = self._start_run(config)
+
+        dataset = self.client.dataset(dataset_id)
+        poller = RunPoller(
+            self.client.run(run_id),
+            max_wait_secs=config.maxWaitSecs,
+            min_interval=config.minPollSecs,
+            max_interval=config.maxPollSecs
+        )
+        offset = saved_offset if resume else 0  # Number of dataset items consumed so far
+        seen_in_run = set()
+
+        while True:
+            stats = ConversionStats()
+            try:
+                # Read the status before draining so nothing written before
+                # a terminal status can be missed
+                self.limiter.acquire('apify_api')
+                with self.metrics.span('poll_wait'):
+                    run_info = poller.wait()
+                self.metrics.inc('polls')
+                status = run_info.get('status')
+
+                # iterate_items pages through the dataset lazily from the offset;
+                # items are converted a page at a time and the offset only
+                # advances (and is checkpointed) once a page has been handed out
+                batch = []
+                items = self._paced_items(self.metrics.timed_iter(
+                    'dataset_download', dataset.iterate_items(offset=offset), 'items_downloaded'
+                ))
+                for item in items:
+                    batch.append(item)
+                    if len(batch) >= CONVERSION_BATCH_SIZE:
+                        offset += len(batch)
+                        posts = self.convert_batch(self._new_items(batch, config, seen_in_run, stats),
+                                                   config.trustedItems, stats)
+                        yield from posts
+                        self._batch_handed_out(config, run_id, dataset_id, offset, posts, mark_seen)
+                        batch = []
+                if batch:
+                    offset += len(batch)
+                    posts = self.convert_batch(self._new_items(batch, config, seen_in_run, stats),
+                                               config.trustedItems, stats)
+                    yield from posts
+                    self._batch_handed_out(config, run_id, dataset_id, offset, posts, mark_seen)
+            except TimeoutError:
+                if self.checkpoints is not None:
+                    self.logger.warning(f"Actor run {run_id} is checkpointed; scrape again to resume it")
+                raise
+            except Exception as e:
+                if poller.expired():
+                    raise Exception(f"Failed to retrieve dataset after {poller.elapsed():.0f}s: {str(e)}")
+                self._rate_limited(e)
+                self.logger.warning(f"Temporary error retrieving dataset: {str(e)}")
+                poller.record(0)
+                poller.sleep()
+                continue
+
+            self._log_batch(stats)
+
+            if status in TERMINAL_STATUSES:
+                self._clear_checkpoint(config)
+            if status == 'FAILED':
+                raise Exception(f"Actor run failed: {run_info.get('errorMessage', 'Unknown error')}")
+            elif status in TERMINAL_STATUSES:
+                if offset == 0:
+                    self.logger.warning("Run finished but no items found")
+                self.logger.info(f"Run finished with status {status} after {offset} items and {poller.polls} polls")
+                return
+
+            poller.record(stats.items + stats.duplicates)
+            self.logger.info(f"Waiting for results... Status: {status} ({int(poller.elapsed())}s elapsed)")
+
+
+class AsyncInstagramScraperService(_ScraperServiceBase):
+    """
+    Asyncio counterpart of InstagramScraperService built on ApifyClientAsync.
+
+    Cancelling a scrape (or closing ``iter_posts`` early) aborts the actor run
+    so it stops consuming compute.
+    """
+
+    def _create_client(self) -> ApifyClientAsync:
+        return ApifyClientAsync(self.api_token)
+
+    async def scrape_posts(self, config: ScraperConfig) -> List[InstagramPost]:
+        """
+        Scrape Instagram posts using Apify API.
+
+        Args:
+            config (ScraperConfig): Scraping configuration
+
+        Returns:
+            List[InstagramPost]: List of scraped posts
+        """
+        try:
+            posts = self._cached_posts(config)
+            if posts is not None:
+                return posts
+
+            posts = [post async for post in self.iter_posts(config, mark_seen=False)]
+            self.logger.info(f"Successfully scraped {len(posts)} posts")
+            self._store_posts(config, posts)
+            self._mark_seen(posts)
+            return posts
+
+        except asyncio.CancelledError:
+            self.logger.info("Scrape cancelled")
+            raise
+        except Exception as e:
+            self.logger.error(f"Error running Apify scraper: {str(e)}", exc_info=True)
+            raise
+
+    async def _start_run(self, config: ScraperConfig) -> Tuple[str, str, int]:
+        """Async counterpart of InstagramScraperService._start_run."""
+        checkpoint = self._saved_run(config)
+        if checkpoint:
+            await self.limiter.acquire_async('apify_api')
+        if checkpoint and self._can_reattach(checkpoint, await self.client.run(checkpoint.run_id).get()):
+            self.metrics.inc('runs_reattached')
+            return checkpoint.run_id, checkpoint.dataset_id, checkpoint.offset
+
+        run_input = self._build_run_input(config)
+
+        self.logger.info(f"Starting Apify scraper with input: {run_input}")
+
+        await self.limiter.acquire_async('actor_start')
+        await self.limiter.acquire_async('apify_api')
+        run = await self.client.actor("your_actor_id").start(run_input=run_input)
+        run_id, dataset_id = self._started_run(config, run)
+        self.metrics.inc('runs_started')
+        return run_id, dataset_id, 0
+
+    async def iter_posts(self, config: ScraperConfig, resume: bool = False,
+                         mark_seen: bool = True) -> AsyncIterator[InstagramPost]:
+        """
+        Stream Instagram posts from an Apify actor run as its dataset grows.
+
+        Args:
+            config (ScraperConfig): Scraping configuration
+            resume (bool): Continue after the items a previous, interrupted
+                consumer already received instead of from the beginning
+            mark_seen (bool): Add each handed-out batch to the seen index
+
+        Yields:
+            InstagramPost: Converted posts, in dataset order
+        """
+        with self.metrics.span('actor_start'):
+            run_id, dataset_id, saved_offset = await self._start_run(config)
+
+        run_client = self.client.run(run_id)
+        dataset = self.client.dataset(dataset_id)
+        poller = AsyncRunPoller(
+            run_client,
+            max_wait_secs=config.maxWaitSecs,
+            min_interval=config.minPollSecs,
+            max_interval=config.maxPollSecs
+        )
+        offset = saved_offset if resume else 0  # Number of dataset items consumed so far
+        seen_in_run = set()
+        finished = False
+
+        try:
             while True:
+                stats = ConversionStats()
                 try:
-                    # Get the dataset
-                    dataset = self.client.dataset(dataset_id)
-                    items = list(dataset.iterate_items())
-                    
-                    if items:
-                        self.logger.info(f"Retrieved {len(items)} items from dataset")
-                        break
-                        
-                    # Check run status
-                    run_info = self.client.run(run_id).get()
+                    await self.limiter.acquire_async('apify_api')
+                    with self.metrics.span('poll_wait'):
+                        run_info = await poller.wait()
+                    self.metrics.inc('polls')
                     status = run_info.get('status')
-                    
-                    if status == 'FAILED':
-                        raise Exception(f"Actor run failed: {run_info.get('errorMessage', 'Unknown error')}")
-                    elif status == 'SUCCEEDED' and not items:
-                        self.logger.warning("Run succeeded but no items found")
-                        break
-                    
-                    elapsed = time.time() - wait_start
-                    if elapsed > max_wait_time:
-                        raise TimeoutError(f"Dataset retrieval timed out after {elapsed} seconds")
-                    
-                    self.logger.info(f"Waiting for results... Status: {status} ({int(elapsed)}s elapsed)")
-                    time.sleep(5)
-                    
+
+                    batch = []
+                    items = self._paced_aitems(self.metrics.timed_aiter(
+                        'dataset_download', dataset.iterate_items(offset=offset), 'items_downloaded'
+                    ))
+                    async for item in items:
+                        batch.append(item)
+                        if len(batch) >= CONVERSION_BATCH_SIZE:
+                            offset += len(batch)
+                            posts = self.convert_batch(self._new_items(batch, config, seen_in_run, stats),
+                                                       config.trustedItems, stats)
+                            for post in posts:
+                                yield post
+                            self._batch_handed_out(config, run_id, dataset_id, offset, posts, mark_seen)
+                            batch = []
+                    if batch:
+                        offset += len(batch)
+                        posts = self.convert_batch(self._new_items(batch, config, seen_in_run, stats),
+                                                   config.trustedItems, stats)
+                        for post in posts:
+                            yield post
+                        self._batch_handed_out(config, run_id, dataset_id, offset, posts, mark_seen)
+                except (TimeoutError, asyncio.TimeoutError):
+                    raise
                 except Exception as e:
-                    elapsed = time.time() - wait_start
-                    if elapsed > max_wait_time:
-                        raise Exception(f"Failed to retrieve dataset after {elapsed}s: {str(e)}")
+                    if poller.expired():
+                        raise Exception(f"Failed to retrieve dataset after {poller.elapsed():.0f}s: {str(e)}")
+                    self._rate_limited(e)
                     self.logger.warning(f"Temporary error retrieving dataset: {str(e)}")
-                    time.sleep(5)
-            
-            # Process results
-            posts = []
-            for idx, item in enumerate(items):
-                try:
-                    self.logger.info(f"Processing item {idx + 1}/{len(items)}")
-                    post = self._convert_apify_to_model(item)
-                    if post:
-                        posts.append(post)
-                        self.logger.info(f"Successfully processed post: {post.shortCode}")
-                    else:
-                        self.logger.warning(f"Skipped item {idx + 1} - conversion returned None")
-                except Exception as e:
-                    self.logger.error(f"Error processing item {idx + 1}: {str(e)}")
+                    poller.record(0)
+                    await poller.sleep()
                     continue
 
-            self.logger.info(f"Successfully scraped {len(posts)} posts out of {len(items)} items")
-            return posts
+                self._log_batch(stats)
 
-        except Exception as e:
-            self.logger.error(f"Error running Apify scraper: {str(e)}", exc_info=True)
+                if status in TERMINAL_STATUSES:
+                    finished = True
+                    self._clear_checkpoint(config)
+                if status == 'FAILED':
+                    raise Exception(f"Actor run failed: {run_info.get('errorMessage', 'Unknown error')}")
+                elif finished:
+                    if offset == 0:
+                        self.logger.warning("Run finished but no items found")
+                    self.logger.info(f"Run finished with status {status} after {offset} items and {poller.polls} polls")
+                    return
+
+                poller.record(stats.items + stats.duplicates)
+                self.logger.info(f"Waiting for results... Status: {status} ({int(poller.elapsed())}s elapsed)")
+        except (asyncio.CancelledError, GeneratorExit):
+            if not finished:
+                await self._abort_run(run_client, run_id)
+                self._clear_checkpoint(config)
             raise
 
-    def _convert_apify_to_model(self, item: Dict) -> Optional[InstagramPost]:
-        """Convert Apify output to InstagramPost model."""
+    async def _abort_run(self, run_client, run_id) -> None:
+        """Abort an unfinished run, shielding the request from the cancellation itself."""
+        self.logger.info(f"Aborting actor run {run_id}")
         try:
-            # Log the raw item structure
-            self.logger.info(f"Raw item keys: {item.keys()}")
-            self.logger.info(f"Processing item with URL: {item.get('url', 'No URL')} and type: {item.get('type', 'No type')}")
-            
-            # Handle timestamp format
-            timestamp_str = item.get('timestamp')
-            if timestamp_str:
-                if timestamp_str.endswith('Z'):
-                    timestamp_str = timestamp_str.replace('Z', '+00:00')
-                timestamp = datetime.fromisoformat(timestamp_str)
-                self.logger.info(f"Parsed timestamp: {timestamp}")
-            else:
-                timestamp = datetime.now()
-                self.logger.warning("No timestamp found, using current time")
-
-            # Extract comments from the response
-            latest_comments = []
-            if 'latestComments' in item:
-                self.logger.info(f"Found {len(item['latestComments'])} comments")
-                for position, comment in enumerate(item['latestComments']):
-                    latest_comments.append({
-                        'id': comment.get('id', ''),
-                        'text': comment.get('text', ''),
-                        'timestamp': comment.get('timestamp', ''),
-                        'ownerId': comment.get('owner', {}).get('id', ''),
-                        'ownerUsername': comment.get('owner', {}).get('username', ''),
-                        'ownerIsVerified': comment.get('owner', {}).get('is_verified', False),
-                        'ownerProfilePicUrl': comment.get('owner', {}).get('profile_pic_url', ''),
-                        'postId': item.get('id', ''),  # Add the post ID
-                        'position': position  # Add the position
-                    })
-            else:
-                self.logger.info("No comments found in item")
-
-            # Log key fields before creating InstagramPost
-            self.logger.info(f"Short code: {item.get('shortCode', 'No shortCode')}")
-            self.logger.info(f"Caption length: {len(item.get('caption', ''))}")
-            self.logger.info(f"Number of images: {len(item.get('images', []))}")
-
-            # Adjust URL handling - check if we have a shortCode
-            shortCode = item.get('shortCode')
-            if not shortCode:
-                shortCode = item.get('url', '').split('/')[-2] if item.get('url') else ''
-                self.logger.info(f"Extracted shortCode from URL: {shortCode}")
-
-            # Create the InstagramPost object with more flexible field handling
-            post = InstagramPost(
-                inputUrl=item.get('url', item.get('inputUrl', '')),  # Try both url and inputUrl
-                url=f"https://www.instagram.com/p/{shortCode}/" if shortCode else item.get('url', ''),
-                type=item.get('type', item.get('mediaType', 'Image')),  # Try both type and mediaType
-                shortCode=shortCode,
-                caption=item.get('caption', item.get('text', '')),  # Try both caption and text
-                hashtags=item.get('hashtags', []),
-                mentions=item.get('mentions', []),
-                commentsCount=item.get('commentsCount', 0),
-                firstComment=item.get('firstComment', ''),
-                latestComments=latest_comments,
-                dimensionsHeight=item.get('dimensionsHeight', item.get('height', 0)),  # Try both formats
-                dimensionsWidth=item.get('dimensionsWidth', item.get('width', 0)),
-                displayUrl=item.get('displayUrl', item.get('imageUrl', '')),  # Try both formats
-                images=item.get('images', [item.get('displayUrl')] if item.get('displayUrl') else []),
-                alt=item.get('alt', item.get('accessibility_caption', '')),  # Try both formats
-                likesCount=item.get('likesCount', 0),
-                timestamp=timestamp,
-                childPosts=item.get('childPosts', []),
-                ownerFullName=item.get('ownerFullName', item.get('fullName', '')),  # Try both formats
-                ownerUsername=item.get('ownerUsername', item.get('username', '')),
-                ownerId=item.get('ownerId', item.get('userId', '')),
-                isSponsored=item.get('isSponsored', False)
-            )
-            
-            # Validate the created post
-            if not post.url or not post.shortCode:
-                self.logger.warning(f"Created post missing critical fields - URL: {post.url}, shortCode: {post.shortCode}")
-                return None
-                
-            self.logger.info(f"Successfully converted post with shortCode: {post.shortCode}")
-            return post
-            
+            await asyncio.shield(run_client.abort())
         except Exception as e:
-            self.logger.error(f"Error converting item to model: {str(e)}", exc_info=True)
-            self.logger.error(f"Problematic item: {item}")
-            return None 
\ No newline at end of file
+            self.logger.warning(f"Failed to abort actor run {run_id}: {str(e)}")
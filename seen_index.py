@@ -0,0 +1,77 @@
+"""
+Persistent index of post shortCodes already delivered by earlier scrapes.
+
+Recurring monitoring scrapes mostly return posts they have returned before.
+With ``ScraperConfig.onlyNew`` the service drops dataset items whose
+shortCode is in the index before converting them, so only new posts are
+validated, rendered and stored.
+"""
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Set, Union
+
+# SQLite's default limit on bound parameters is 999 on older builds
+_CHUNK_SIZE = 900
+
+
+class SeenIndex:
+    """
+    SQLite set of shortCodes with the time each was first seen.
+
+    Args:
+        path: SQLite database file; parent directories are created
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen (short_code TEXT PRIMARY KEY, first_seen REAL NOT NULL) "
+                "WITHOUT ROWID"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A connection per operation keeps the index usable from scrape_many threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def known(self, short_codes: Iterable[str]) -> Set[str]:
+        """The subset of ``short_codes`` already in the index."""
+        short_codes = list(dict.fromkeys(short_codes))
+        found: Set[str] = set()
+        with self._connect() as conn:
+            for start in range(0, len(short_codes), _CHUNK_SIZE):
+                chunk = short_codes[start:start + _CHUNK_SIZE]
+                rows = conn.execute(
+                    f"SELECT short_code FROM seen WHERE short_code IN ({','.join('?' * len(chunk))})", chunk
+                )
+                found.update(row[0] for row in rows)
+        return found
+
+    def add(self, short_codes: Iterable[str]) -> None:
+        """Record ``short_codes`` as seen; codes already present keep their first-seen time."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO seen (short_code, first_seen) VALUES (?, ?)",
+                ((code, now) for code in short_codes)
+            )
+
+    def __contains__(self, short_code: str) -> bool:
+        return bool(self.known([short_code]))
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM seen")
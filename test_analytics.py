@@ -0,0 +1,121 @@
+import json
+import pytest
+from collections import Counter
+import analytics
+from analytics import PostFrame, hashtag_pairs, hashtag_stats
+from benchmarks.synthetic import make_items
+from scraper_service import InstagramScraperService
+
+@pytest.fixture
+def posts():
+    """Posts converted from synthetic Apify items."""
+    scraper = InstagramScraperService(api_token='test_token')
+    return scraper.convert_batch(make_items(200, seed=1))
+
+def test_post_frame_aggregates_match_python(posts):
+    """Test that frame aggregates match the plain Python computation."""
+    frame = PostFrame.from_posts(posts)
+    total_likes = sum(post.likesCount for post in posts)
+
+    assert len(frame) == len(posts)
+    assert frame.total_likes == total_likes
+    assert frame.avg_likes == total_likes // len(posts)
+    assert frame.avg_comments == sum(post.commentsCount for post in posts) // len(posts)
+
+def test_post_frame_interns_strings(posts):
+    """Test that owners and hashtags are stored once and decode back correctly."""
+    frame = PostFrame.from_posts(posts)
+    df = frame.to_dataframe()
+
+    assert len(frame.owners) == len({post.ownerUsername for post in posts})
+    assert len(frame.hashtags) == len({tag for post in posts for tag in post.hashtags})
+    assert list(df['ownerUsername']) == [post.ownerUsername for post in posts]
+    assert list(df['hashtags']) == [post.hashtags for post in posts]
+
+def test_post_frame_accepts_dumped_posts(posts):
+    """Test that model_dump() dicts, as used by the app, give the same table."""
+    from_models = PostFrame.from_posts(posts).engagement_table()
+    from_dicts = PostFrame.from_posts([post.model_dump() for post in posts]).engagement_table()
+
+    assert from_models.equals(from_dicts)
+    row = from_models.iloc[0]
+    assert row['URL'] == f"https://www.instagram.com/p/{posts[0].shortCode}/"
+    assert row['Date'] == posts[0].timestamp.strftime('%Y-%m-%d %H:%M')
+
+def test_post_frame_empty():
+    """Test that an empty frame reports zeros instead of dividing by zero."""
+    frame = PostFrame.from_posts([])
+
+    assert len(frame) == 0
+    assert (frame.total_likes, frame.avg_likes, frame.avg_comments) == (0, 0, 0)
+    assert frame.engagement_table().empty
+
+def _reference_hashtag_rows(posts):
+    """The dashboard's original dict-based hashtag aggregation."""
+    stats = {}
+    for post in posts:
+        for tag in post.hashtags:
+            entry = stats.setdefault(tag, {'count': 0, 'likes': 0, 'comments': 0})
+            entry['count'] += 1
+            entry['likes'] += post.likesCount
+            entry['comments'] += post.commentsCount
+    rows = [
+        {
+            'Hashtag': f"#{tag}",
+            'Usage Count': entry['count'],
+            'Avg. Likes': entry['likes'] // entry['count'],
+            'Avg. Comments': entry['comments'] // entry['count']
+        }
+        for tag, entry in stats.items()
+    ]
+    rows.sort(key=lambda row: row['Usage Count'], reverse=True)
+    return rows
+
+def test_hashtag_stats_matches_dict_loop(posts):
+    """Test that the vectorised aggregation matches the original loop, ties included."""
+    expected = _reference_hashtag_rows(posts)
+    stats = hashtag_stats(posts)
+
+    assert stats.rows() == expected
+    assert stats.rows(5) == expected[:5]
+    assert stats.rows(0) == []
+
+def test_hashtag_pairs_counts_co_occurrence(posts):
+    """Test pair counts against a brute-force count over each post's tags."""
+    expected = Counter()
+    for post in posts:
+        tags = post.hashtags
+        for i, first in enumerate(tags):
+            for second in tags[i + 1:]:
+                if first != second:
+                    expected[frozenset((first, second))] += 1
+
+    pairs = hashtag_pairs(posts, k=10)
+
+    assert len(pairs) == 10
+    assert [count for _, _, count in pairs] == sorted((count for _, _, count in pairs), reverse=True)
+    assert all(expected[frozenset((first, second))] == count for first, second, count in pairs)
+    assert pairs[0][2] == max(expected.values())
+
+def test_hashtag_cli_reads_json_export(posts, tmp_path, capsys):
+    """Test the hashtag CLI on a file in the app's JSON export format."""
+    path = tmp_path / "export.json"
+    path.write_text(json.dumps([post.model_dump() for post in posts], default=str, indent=2))
+
+    assert analytics.main([str(path), "--top", "3", "--pairs", "2"]) == 0
+
+    output = capsys.readouterr().out
+    assert f"{len(posts):,} posts" in output
+    assert _reference_hashtag_rows(posts)[0]['Hashtag'] in output
+
+def test_hashtag_cli_reads_parquet_export(posts, tmp_path, capsys):
+    """Test the hashtag CLI on a Parquet export directory."""
+    pytest.importorskip("pyarrow.parquet")
+    from exporters import write_parquet
+    write_parquet(posts, tmp_path / "export")
+
+    assert analytics.main([str(tmp_path / "export"), "--top", "3"]) == 0
+
+    output = capsys.readouterr().out
+    assert f"{len(posts):,} posts" in output
+    assert _reference_hashtag_rows(posts)[0]['Hashtag'] in output
@@ -0,0 +1,92 @@
+import csv
+import gzip
+import io
+import json
+import pytest
+from benchmarks.synthetic import make_items
+from exporters import (CSV_COLUMNS, export_bytes, export_posts, read_parquet, read_parquet_posts, write_csv,
+                       write_ndjson, write_parquet)
+from scraper_service import InstagramScraperService
+
+@pytest.fixture
+def posts():
+    scraper = InstagramScraperService(api_token='test_token')
+    return scraper.convert_batch(make_items(20))
+
+def _lines(data: bytes):
+    return [json.loads(line) for line in data.decode('utf-8').splitlines()]
+
+def test_ndjson_matches_model_json(posts):
+    """Test that each NDJSON line holds one post equal to its JSON dump."""
+    data = export_bytes(posts, 'ndjson')
+
+    records = _lines(data)
+    assert len(records) == len(posts)
+    assert records == [json.loads(post.model_dump_json()) for post in posts]
+
+def test_models_and_dumped_dicts_export_alike(posts):
+    """Test that the app's model_dump() dicts export exactly like the models."""
+    assert export_bytes([post.model_dump() for post in posts]) == export_bytes(posts)
+
+def test_gzip_export_to_path(tmp_path, posts):
+    """Test that the gzip format writes a compressed NDJSON file to a path."""
+    path = tmp_path / "posts.ndjson.gz"
+
+    assert export_posts(posts, path, 'ndjson.gz') == len(posts)
+    with gzip.open(path, 'rb') as handle:
+        assert _lines(handle.read()) == _lines(export_bytes(posts))
+
+def test_export_streams_from_generator_into_open_file(posts):
+    """Test that a generator is consumed lazily and a caller's file object stays open."""
+    consumed = []
+
+    def generate():
+        for post in posts:
+            consumed.append(post)
+            yield post
+
+    buffer = io.BytesIO()
+    assert write_ndjson(generate(), buffer) == len(posts)
+    assert len(consumed) == len(posts)
+    assert not buffer.closed
+
+def test_csv_has_one_row_per_post(posts):
+    """Test the CSV header and that list fields are space-separated."""
+    buffer = io.BytesIO()
+    write_csv(posts, buffer)
+
+    rows = list(csv.DictReader(io.StringIO(buffer.getvalue().decode('utf-8'))))
+    assert list(rows[0]) == CSV_COLUMNS
+    assert len(rows) == len(posts)
+    assert rows[0]['shortCode'] == posts[0].shortCode
+    assert rows[0]['hashtags'] == ' '.join(posts[0].hashtags)
+    assert int(rows[0]['likesCount']) == posts[0].likesCount
+
+def test_unknown_format_is_rejected(posts):
+    with pytest.raises(ValueError, match="Unknown export format"):
+        export_bytes(posts, 'xml')
+
+def test_parquet_round_trip(tmp_path, posts):
+    """Test that a Parquet export reads back into identical post models."""
+    pytest.importorskip("pyarrow.parquet")
+    comments = sum(len(post.latestComments) for post in posts)
+
+    assert write_parquet(iter(posts), tmp_path, batch_size=7) == (len(posts), comments)
+    assert read_parquet_posts(tmp_path) == posts
+
+def test_parquet_tables(tmp_path, posts):
+    """Test the list columns and the comments child table keyed by shortCode."""
+    pytest.importorskip("pyarrow.parquet")
+    write_parquet([post.model_dump() for post in posts], tmp_path)
+
+    post_table, comment_table = read_parquet(tmp_path)
+    assert list(post_table['shortCode']) == [post.shortCode for post in posts]
+    assert list(post_table['hashtags'][0]) == posts[0].hashtags
+    assert 'latestComments' not in post_table.columns
+    expected = [(post.shortCode, comment.id) for post in posts for comment in post.latestComments]
+    assert list(zip(comment_table['shortCode'], comment_table['id'])) == expected
+
+def test_parquet_empty_export(tmp_path):
+    pytest.importorskip("pyarrow.parquet")
+    assert write_parquet([], tmp_path) == (0, 0)
+    assert read_parquet_posts(tmp_path) == []
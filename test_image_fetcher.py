@@ -0,0 +1,207 @@
+import socket
+import threading
+import time
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from fake_apify import FakeClock
+from image_fetcher import HostHealth, ImageCache, ImageFetcher, cache_key, post_image_urls, prefetch_images
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    """Serves a small fake image for any path and counts requests."""
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        body = f"image:{self.path.split('?')[0]}".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def image_server():
+    """Local HTTP server standing in for the CDN."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ImageHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def _url(server, path, signature="a"):
+    return f"http://127.0.0.1:{server.server_port}/v/{path}.jpg?oh={signature}"
+
+def test_second_render_makes_no_network_calls(image_server):
+    """Test that re-rendering 200 cards is served entirely from the cache."""
+    fetcher = ImageFetcher()
+    urls = [_url(image_server, f"img{i}") for i in range(200)]
+
+    first = [fetcher.fetch(url) for url in urls]
+    second = [fetcher.fetch(url) for url in urls]
+
+    assert second == first
+    assert len(image_server.requests) == 200
+    assert fetcher.cache.stats()['memory_hits'] == 200
+
+def test_cache_key_ignores_signed_query(image_server):
+    """Test that a re-signed URL for the same image is a cache hit."""
+    fetcher = ImageFetcher()
+    fetcher.fetch(_url(image_server, "photo", signature="a"))
+    fetcher.fetch(_url(image_server, "photo", signature="b"))
+
+    assert len(image_server.requests) == 1
+    assert cache_key(_url(image_server, "photo", "a")) == cache_key(_url(image_server, "photo", "b"))
+
+def test_memory_lru_is_bounded():
+    """Test that the memory tier evicts least recently used entries."""
+    cache = ImageCache(max_items=2)
+    cache.put("https://cdn/a.jpg", b"a")
+    cache.put("https://cdn/b.jpg", b"b")
+    cache.get("https://cdn/a.jpg")
+    cache.put("https://cdn/c.jpg", b"c")
+
+    assert cache.get("https://cdn/b.jpg") is None
+    assert cache.get("https://cdn/a.jpg") == b"a"
+    assert cache.stats()['entries'] == 2
+
+def test_disk_tier_survives_memory_loss(tmp_path):
+    """Test that the disk tier serves images after the memory tier is dropped."""
+    cache = ImageCache(disk_dir=tmp_path)
+    cache.put("https://cdn/a.jpg?oh=1", b"image-bytes")
+    cache.clear_memory()
+
+    assert cache.get("https://cdn/a.jpg?oh=2") == b"image-bytes"
+    assert cache.stats()['disk_hits'] == 1
+
+class _SlowImageHandler(_ImageHandler):
+    """Image handler that takes a while and tracks concurrent requests."""
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.active += 1
+            self.server.peak = max(self.server.peak, self.server.active)
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.active -= 1
+        super().do_GET()
+
+@pytest.fixture
+def slow_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowImageHandler)
+    server.requests, server.lock, server.active, server.peak, server.delay = [], threading.Lock(), 0, 0, 0.2
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_prefetch_runs_in_parallel_with_host_limit(slow_server):
+    """Test that prefetching takes about one image's latency, not N of them."""
+    fetcher = ImageFetcher()
+    urls = [_url(slow_server, f"img{i}") for i in range(20)]
+
+    started = time.monotonic()
+    results = prefetch_images(urls, fetcher=fetcher, max_workers=20, per_host_limit=10)
+    elapsed = time.monotonic() - started
+
+    assert all(error is None for error in results.values())
+    assert elapsed < 20 * slow_server.delay / 4
+    assert slow_server.peak <= 10
+    assert fetcher.fetch(urls[0]) == b"image:/v/img0.jpg"
+    assert len(slow_server.requests) == 20
+
+def test_prefetch_deadline_falls_back_fast(slow_server):
+    """Test that images missing the deadline fail fast when the card renders."""
+    slow_server.delay = 1.0
+    fetcher = ImageFetcher()
+    url = _url(slow_server, "late")
+
+    started = time.monotonic()
+    results = prefetch_images([url], fetcher=fetcher, deadline=0.2)
+
+    assert isinstance(results[url], TimeoutError)
+    assert time.monotonic() - started < 0.5
+    with pytest.raises(TimeoutError):
+        fetcher.fetch(url)
+    assert time.monotonic() - started < 0.5
+
+def test_post_image_urls_lists_display_and_carousel_images():
+    """Test that prefetch covers the card image and additional carousel images."""
+    posts = [
+        {'displayUrl': 'https://cdn/a0.jpg', 'images': ['https://cdn/a0.jpg', 'https://cdn/a1.jpg']},
+        {'displayUrl': None, 'images': ['https://cdn/b0.jpg']},
+        {'images': []}
+    ]
+
+    assert post_image_urls(posts) == ['https://cdn/a0.jpg', 'https://cdn/a1.jpg', 'https://cdn/b0.jpg']
+
+def _dead_host():
+    """Address of a local port with nothing listening on it."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"127.0.0.1:{sock.getsockname()[1]}"
+
+def _host(server):
+    return f"127.0.0.1:{server.server_port}"
+
+def test_failover_skips_dead_host_on_later_fetches(image_server):
+    """Test that a host that refused a connection is not tried again during its cooldown."""
+    dead = _dead_host()
+    fetcher = ImageFetcher(cdn_hosts=[_host(image_server)], cdn_scheme="http")
+
+    assert fetcher.fetch(f"http://{dead}/v/a.jpg?oh=1") == b"image:/v/a.jpg"
+    assert fetcher.network_fetches == 2
+    assert not fetcher.health.available(dead)
+
+    assert fetcher.fetch(f"http://{dead}/v/b.jpg?oh=1") == b"image:/v/b.jpg"
+    assert fetcher.network_fetches == 3
+    assert image_server.requests == ["/v/a.jpg?oh=1", "/v/b.jpg?oh=1"]
+
+def test_unresponsive_host_costs_one_timeout(slow_server, image_server):
+    """Test that a hanging CDN host delays only the first image, not every image."""
+    slow_server.delay = 1.0
+    fetcher = ImageFetcher(timeout=0.3, cdn_hosts=[_host(image_server)], cdn_scheme="http")
+    urls = [_url(slow_server, f"img{i}") for i in range(5)]
+
+    started = time.monotonic()
+    images = [fetcher.fetch(url) for url in urls]
+    elapsed = time.monotonic() - started
+
+    assert images == [f"image:/v/img{i}.jpg".encode() for i in range(5)]
+    assert elapsed < 0.3 * 2
+    assert len(image_server.requests) == 5
+
+def test_hedged_fetch_returns_fastest_host(slow_server, image_server):
+    """Test that hedged mode races the best two hosts and takes the first answer."""
+    slow_server.delay = 1.0
+    fetcher = ImageFetcher(cdn_hosts=[_host(image_server)], cdn_scheme="http", hedged=True)
+
+    started = time.monotonic()
+    assert fetcher.fetch(_url(slow_server, "photo")) == b"image:/v/photo.jpg"
+    assert time.monotonic() - started < 0.5
+
+def test_host_health_ranks_by_failures_then_latency():
+    """Test host ordering and the doubling cooldown of failing hosts."""
+    clock = FakeClock()
+    health = HostHealth(cooldown=10, max_cooldown=25, clock=clock.monotonic)
+    health.record_success("slow", 0.8)
+    health.record_success("fast", 0.1)
+    health.record_failure("flaky")
+
+    assert health.rank(["untried", "slow", "flaky", "fast"]) == ["fast", "slow", "untried"]
+
+    clock.sleep(10)
+    assert health.rank(["slow", "flaky"]) == ["slow", "flaky"]
+    health.record_failure("flaky")
+    clock.sleep(19)
+    assert not health.available("flaky")
+    clock.sleep(1)
+    assert health.available("flaky")
+
+    health.record_failure("flaky")
+    assert health.snapshot()["flaky"]["cooldown"] == 25
+    assert health.rank(["flaky"]) == ["flaky"]
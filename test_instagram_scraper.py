@@ -0,0 +1,82 @@
+import json
+import subprocess
+import sys
+import pytest
+from benchmarks.synthetic import make_items
+from fake_apify import FakeApifyClient, FakeRun
+import instagram_scraper
+from scraper_service import InstagramScraperService
+
+URLS = [f"https://www.instagram.com/user{i}/" for i in range(3)]
+
+@pytest.fixture
+def urls_file(tmp_path):
+    path = tmp_path / "urls.txt"
+    path.write_text("# profiles\n" + "\n".join(URLS) + "\n\n" + URLS[0] + "\n")
+    return path
+
+def _service(fail_urls=()):
+    """Service on a fake client whose runs return 5 posts named after their URL."""
+    client = FakeApifyClient([])
+
+    def run_factory():
+        url = client.run_inputs[-1]['directUrls'][0]
+        name = url.rstrip('/').rsplit('/', 1)[-1]
+        items = [dict(item, shortCode=f"{name}_{i}") for i, item in enumerate(make_items(5))]
+        status = 'FAILED' if url in fail_urls else 'SUCCEEDED'
+        return FakeRun(client.clock, items, 0, status, "boom")
+
+    client.run_factory = run_factory
+    service = InstagramScraperService(api_token='test_token')
+    service.client = client
+    return service
+
+def _short_codes(path):
+    return [json.loads(line)['shortCode'] for line in path.read_text().splitlines()]
+
+def test_cli_writes_ndjson(urls_file, tmp_path, capsys):
+    """Test a full batch: deduplicated URLs, one job each, all posts in the output."""
+    output = tmp_path / "posts.ndjson"
+    service = _service()
+
+    assert instagram_scraper.main([str(urls_file), "-o", str(output), "--concurrency", "1"], service=service) == 0
+
+    assert sorted(_short_codes(output)) == sorted(f"user{u}_{i}" for u in range(3) for i in range(5))
+    assert service.client.calls['actor.start'] == 3
+    assert "3 jobs succeeded, 0 failed, 15 posts" in capsys.readouterr().out
+
+def test_cli_resumes_after_failure(urls_file, tmp_path):
+    """Test that a rerun only scrapes the jobs missing from the checkpoint."""
+    output = tmp_path / "posts.ndjson"
+    argv = [str(urls_file), "-o", str(output), "--concurrency", "1"]
+
+    assert instagram_scraper.main(argv, service=_service(fail_urls={URLS[1]})) == 1
+    assert len(_short_codes(output)) == 10
+
+    # Bytes a crashed writer left after the last checkpointed job are dropped
+    with open(output, 'ab') as handle:
+        handle.write(b'{"shortCode": "half-writ')
+    service = _service()
+    assert instagram_scraper.main(argv, service=service) == 0
+
+    assert service.client.calls['actor.start'] == 1
+    assert sorted(_short_codes(output)) == sorted(f"user{u}_{i}" for u in range(3) for i in range(5))
+
+def test_cli_writes_parquet_parts(urls_file, tmp_path):
+    """Test that Parquet output is one part per job, read back as one export."""
+    pytest.importorskip("pyarrow.parquet")
+    from exporters import read_parquet_posts
+    output = tmp_path / "posts"
+
+    assert instagram_scraper.main([str(urls_file), "-o", str(output), "-f", "parquet", "--concurrency", "1"], service=_service()) == 0
+
+    assert len(list(output.glob("part-*"))) == 3
+    assert sorted(post.shortCode for post in read_parquet_posts(output)) == \
+        sorted(f"user{u}_{i}" for u in range(3) for i in range(5))
+
+def test_cli_does_not_import_streamlit_or_pandas():
+    """Test that the CLI's imports stay light enough for cron jobs."""
+    code = "import sys, instagram_scraper; print(sorted({'streamlit', 'pandas'} & set(sys.modules)))"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+    assert output.strip() == "[]"
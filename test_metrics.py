@@ -0,0 +1,98 @@
+import urllib.request
+from unittest.mock import Mock
+from benchmarks.synthetic import make_items
+from fake_apify import FakeApifyClient
+from image_fetcher import ImageFetcher
+from metrics import Metrics, serve_prometheus
+from models import ScraperConfig
+from scraper_service import InstagramScraperService
+
+CONFIG = ScraperConfig(
+    addParentData=False,
+    directUrls=["https://www.instagram.com/test_user/"],
+    enhanceUserSearchWithFacebookPage=False,
+    isUserReelFeedURL=False,
+    isUserTaggedFeedURL=False,
+    resultsLimit=1,
+    resultsType="posts",
+    searchLimit=1,
+    searchType="user"
+)
+
+def test_disabled_metrics_record_nothing():
+    """Test that a disabled registry ignores counters, spans and wrapped iterables."""
+    metrics = Metrics()
+    items = [1, 2, 3]
+    metrics.inc('polls')
+    with metrics.span('poll_wait'):
+        pass
+
+    assert metrics.timed_iter('dataset_download', items, 'items_downloaded') is items
+    assert metrics.snapshot() == {'enabled': False, 'counters': {}, 'spans': {}}
+
+def test_snapshot_and_prometheus_text():
+    """Test that counters and spans appear in the JSON snapshot and the Prometheus output."""
+    metrics = Metrics(enabled=True)
+    metrics.inc('image_bytes_downloaded', 2_500_000)
+    metrics.observe('conversion', 0.5)
+    metrics.observe('conversion', 1.5)
+    assert list(metrics.timed_iter('dataset_download', range(4), 'items_downloaded')) == [0, 1, 2, 3]
+
+    snapshot = metrics.snapshot()
+    assert snapshot['counters'] == {'image_bytes_downloaded': 2_500_000, 'items_downloaded': 4}
+    assert snapshot['spans']['conversion'] == {'count': 2, 'total_seconds': 2.0, 'max_seconds': 1.5,
+                                               'mean_seconds': 1.0}
+    text = metrics.prometheus()
+    assert "# TYPE instagram_scraper_image_bytes_downloaded_total counter" in text
+    assert "instagram_scraper_image_bytes_downloaded_total 2500000\n" in text
+    assert "instagram_scraper_conversion_seconds_count 2\n" in text
+    assert "instagram_scraper_conversion_seconds_sum 2.000000\n" in text
+
+def test_scrape_records_stage_timings_and_counters():
+    """Test that a scrape reports actor start, polls, downloads and conversion outcomes."""
+    metrics = Metrics(enabled=True)
+    items = make_items(30)
+    items[3] = {'error': 'no_items'}
+    items[7] = dict(items[7], likesCount='many')
+    items.append(items[0])
+    service = InstagramScraperService(api_token='test_token', metrics=metrics)
+    service.client = FakeApifyClient(items)
+
+    posts = service.scrape_posts(CONFIG)
+
+    counters = metrics.snapshot()['counters']
+    assert len(posts) == 28
+    assert counters['runs_started'] == 1
+    assert counters['polls'] >= 1
+    assert counters['items_downloaded'] == 31
+    assert counters['items_duplicate'] == 1
+    assert counters['items_converted'] == 28
+    assert counters['items_skipped'] + counters['conversion_failures'] == 2
+    assert {'actor_start', 'poll_wait', 'dataset_download', 'conversion'} <= set(metrics.snapshot()['spans'])
+
+def test_fetcher_counts_cache_hits_and_bytes():
+    """Test that image fetches count cache hits, misses and downloaded bytes."""
+    metrics = Metrics(enabled=True)
+    session = Mock()
+    session.get.return_value = Mock(content=b"x" * 100)
+    fetcher = ImageFetcher(session=session, cdn_hosts=[], metrics=metrics)
+
+    fetcher.fetch("https://cdn.example.com/a.jpg")
+    fetcher.fetch("https://cdn.example.com/a.jpg")
+
+    snapshot = metrics.snapshot()
+    assert snapshot['counters'] == {'image_cache_misses': 1, 'image_cache_hits': 1, 'image_bytes_downloaded': 100}
+    assert snapshot['spans']['image_download']['count'] == 1
+
+def test_prometheus_endpoint():
+    """Test that /metrics serves the Prometheus text."""
+    metrics = Metrics(enabled=True)
+    metrics.inc('polls', 3)
+    server = serve_prometheus(0, metrics, host="127.0.0.1")
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as response:
+            assert response.headers['Content-Type'].startswith('text/plain')
+            assert "instagram_scraper_polls_total 3" in response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
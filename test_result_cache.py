@@ -0,0 +1,81 @@
+import pytest
+from unittest.mock import patch
+from benchmarks.synthetic import make_items
+from fake_apify import FakeApifyClient
+from models import ScraperConfig
+from result_cache import ResultCache
+from scraper_service import InstagramScraperService
+
+@pytest.fixture
+def config():
+    return ScraperConfig(
+        addParentData=False,
+        directUrls=["https://www.instagram.com/a/", "https://www.instagram.com/b/"],
+        enhanceUserSearchWithFacebookPage=False,
+        isUserReelFeedURL=False,
+        isUserTaggedFeedURL=False,
+        resultsLimit=10,
+        resultsType="posts",
+        searchLimit=1,
+        searchType="user"
+    )
+
+@pytest.fixture
+def posts():
+    scraper = InstagramScraperService(api_token='test_token')
+    return scraper.convert_batch(make_items(20))
+
+def test_fingerprint_ignores_url_order_and_polling(config):
+    """Test that only result-defining fields change the cache key."""
+    reordered = config.model_copy(update={'directUrls': list(reversed(config.directUrls))})
+    polled = config.model_copy(update={'maxWaitSecs': 5, 'minPollSecs': 2})
+
+    assert config.fingerprint() == reordered.fingerprint() == polled.fingerprint()
+    assert config.fingerprint() != config.model_copy(update={'resultsLimit': 11}).fingerprint()
+
+def test_cache_round_trip_and_counters(tmp_path, posts):
+    """Test that stored posts come back equal and hits/misses are counted."""
+    cache = ResultCache(tmp_path / "cache.sqlite")
+
+    assert cache.get("key") is None
+    cache.put("key", posts)
+    assert cache.get("key") == posts
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+    assert cache.stats()['entries'] == 1
+
+def test_cache_expires_entries(tmp_path, posts):
+    """Test that entries older than the TTL are misses."""
+    cache = ResultCache(tmp_path / "cache.sqlite", ttl_seconds=60)
+    with patch('result_cache.time.time', return_value=1000.0):
+        cache.put("key", posts)
+    with patch('result_cache.time.time', return_value=1061.0):
+        assert cache.get("key") is None
+    assert cache.stats()['entries'] == 0
+
+def test_cache_evicts_least_recently_used(tmp_path, posts):
+    """Test that the size budget evicts the least recently read entry."""
+    cache = ResultCache(tmp_path / "cache.sqlite")
+    for index, key in enumerate(["a", "b", "c"]):
+        with patch('result_cache.time.time', return_value=1000.0 + index):
+            cache.put(key, posts)
+    with patch('result_cache.time.time', return_value=1010.0):
+        cache.get("a")
+    cache.max_bytes = cache.stats()['bytes'] * 2 // 3
+    with patch('result_cache.time.time', return_value=1011.0):
+        cache.put("c", posts)
+        assert cache.get("b") is None
+        assert cache.get("a") == posts
+
+def test_scrape_posts_uses_cache(tmp_path, config):
+    """Test that a repeated scrape is served without starting another actor run."""
+    fake_client = FakeApifyClient(make_items(20))
+    with patch('scraper_service.ApifyClient', return_value=fake_client):
+        scraper = InstagramScraperService(api_token='test_token', cache=ResultCache(tmp_path / "cache.sqlite"))
+
+    first = scraper.scrape_posts(config)
+    second = scraper.scrape_posts(config.model_copy(update={'directUrls': list(reversed(config.directUrls))}))
+
+    assert second == first
+    assert fake_client.calls['actor.start'] == 1
+    assert scraper.cache.stats()['hits'] == 1
@@ -1,8 +1,15 @@
+import asyncio
+import logging
 import pytest
+import threading
+import time
 from unittest.mock import Mock, patch, MagicMock
 from models import ScraperConfig, InstagramPost
-from scraper_service import InstagramScraperService
+from scraper_service import AsyncInstagramScraperService, ConversionStats, InstagramScraperService, split_config
 from datetime import datetime
+from checkpoint_store import CheckpointStore
+from seen_index import SeenIndex
+from fake_apify import FakeApifyClient, FakeApifyClientAsync
 
 @pytest.fixture
 def mock_apify_client():
@@ -16,7 +23,8 @@ def mock_apify_client():
         'status': 'SUCCEEDED',
         'defaultDatasetId': 'test_dataset_id'
     }
-    mock_client.actor.return_value.call.return_value = mock_run
+    mock_client.actor.return_value.start.return_value = mock_run
+    mock_client.run.return_value.wait_for_finish.return_value = {'status': 'SUCCEEDED'}
     
     # Create test data
     test_data = [{
@@ -58,7 +66,11 @@ def mock_error_apify_client():
         'status': 'FAILED',
         'errorMessage': 'API error occurred'
     }
-    mock_client.actor.return_value.call.return_value = mock_run
+    mock_client.actor.return_value.start.return_value = mock_run
+    mock_client.run.return_value.wait_for_finish.return_value = {
+        'status': 'FAILED',
+        'errorMessage': 'API error occurred'
+    }
     
     return mock_client
 
@@ -146,7 +158,7 @@ def test_scrape_posts_empty_urls(scraper):
         'status': 'SUCCEEDED',
         'defaultDatasetId': 'test_dataset_id'
     }
-    mock_client.actor.return_value.call.return_value = mock_run
+    mock_client.actor.return_value.start.return_value = mock_run
     
     # Mock the dataset with empty results
     mock_dataset = MagicMock()
@@ -155,7 +167,7 @@ def test_scrape_posts_empty_urls(scraper):
     
     # Mock the run status check
     mock_run_info = MagicMock()
-    mock_run_info.get.return_value = {'status': 'SUCCEEDED'}
+    mock_run_info.wait_for_finish.return_value = {'status': 'SUCCEEDED'}
     mock_client.run.return_value = mock_run_info
     
     # Replace the client for this test
@@ -163,4 +175,288 @@ def test_scrape_posts_empty_urls(scraper):
         with patch.dict('os.environ', {'APIFY_API_TOKEN': 'test_token'}):
             scraper = InstagramScraperService()
             results = scraper.scrape_posts(config)
-            assert len(results) == 0
\ No newline at end of file
+            assert len(results) == 0
+
+def test_scrape_posts_run_failed(error_scraper, mock_config):
+    """Test that a failed actor run surfaces its error message."""
+    with pytest.raises(Exception, match="API error occurred"):
+        error_scraper.scrape_posts(mock_config)
+
+def test_iter_posts_fetches_only_new_items(scraper, mock_config, mock_apify_client):
+    """Test that each poll reads the dataset from the last consumed offset."""
+    item = next(mock_apify_client.dataset().iterate_items())
+    items = [dict(item, shortCode=f"post{i}") for i in range(5)]
+    available = {'count': 2}
+    offsets = []
+
+    def iterate_items(offset=0):
+        offsets.append(offset)
+        visible = items[offset:available['count']]
+        available['count'] = len(items)  # The rest lands before the next poll
+        return iter(visible)
+
+    mock_apify_client.dataset.return_value.iterate_items.side_effect = iterate_items
+    mock_apify_client.run.return_value.wait_for_finish.side_effect = [
+        {'status': 'RUNNING'},
+        {'status': 'SUCCEEDED'}
+    ]
+
+    with patch('scraper_service.time.sleep'):
+        posts = scraper.iter_posts(mock_config)
+        assert next(posts).shortCode == 'post0'
+        results = [next(posts)] + list(posts)
+
+    assert [post.shortCode for post in results] == ['post1', 'post2', 'post3', 'post4']
+    assert offsets == [0, 2]
+
+@pytest.fixture
+def fake_items(mock_apify_client):
+    """Distinct dataset items built from the mock fixture's sample item."""
+    item = next(mock_apify_client.dataset().iterate_items())
+    return [dict(item, shortCode=f"post{i}") for i in range(2000)]
+
+def _run_with_fake(fake_client, config, checkpoints=None, seen=None):
+    """Scrape with a fake client, running the service on its virtual clock."""
+    with patch('scraper_service.ApifyClient', return_value=fake_client), \
+            patch.dict('os.environ', {'APIFY_API_TOKEN': 'test_token'}), \
+            patch('scraper_service.time.monotonic', fake_client.clock.monotonic), \
+            patch('scraper_service.time.sleep', fake_client.clock.sleep):
+        return InstagramScraperService(checkpoints=checkpoints, seen=seen).scrape_posts(config)
+
+def test_polling_returns_when_fast_run_finishes(mock_config, fake_items):
+    """Test that a short run is picked up the moment it finishes."""
+    fake_client = FakeApifyClient(fake_items[:10], duration=2.5)
+    results = _run_with_fake(fake_client, mock_config)
+
+    assert len(results) == 10
+    assert fake_client.clock.now == pytest.approx(2.5)  # No sleeping past completion
+    assert fake_client.calls['run.wait_for_finish'] <= 4
+
+def test_polling_backs_off_on_long_runs(mock_config, fake_items):
+    """Test that a long run costs far fewer API calls than fixed 5 s polling."""
+    config = mock_config.model_copy(update={'maxWaitSecs': 1200})
+    fake_client = FakeApifyClient(fake_items, duration=900)
+    results = _run_with_fake(fake_client, config)
+
+    assert len(results) == len(fake_items)
+    assert fake_client.clock.now == pytest.approx(900)
+    fixed_interval_polls = 900 // 5
+    assert fake_client.calls['run.wait_for_finish'] < fixed_interval_polls
+    assert fake_client.calls['dataset.page'] < fixed_interval_polls
+
+def test_polling_respects_configured_deadline(mock_config, fake_items):
+    """Test that the deadline from ScraperConfig bounds the total wait."""
+    config = mock_config.model_copy(update={'maxWaitSecs': 60})
+    fake_client = FakeApifyClient(fake_items, duration=900)
+
+    with pytest.raises(TimeoutError):
+        _run_with_fake(fake_client, config)
+    assert fake_client.clock.now == pytest.approx(60)
+
+def test_scrape_many_runs_jobs_concurrently(scraper, mock_config):
+    """Test that scrape_many bounds concurrency and reports per-job errors."""
+    configs = split_config(
+        mock_config.model_copy(update={'directUrls': [f"https://www.instagram.com/user{i}/" for i in range(6)]})
+    )
+    lock = threading.Lock()
+    in_flight = {'current': 0, 'peak': 0}
+
+    def fake_scrape(config):
+        with lock:
+            in_flight['current'] += 1
+            in_flight['peak'] = max(in_flight['peak'], in_flight['current'])
+        time.sleep(0.05)
+        with lock:
+            in_flight['current'] -= 1
+        if 'user3' in str(config.directUrls[0]):
+            raise RuntimeError("actor failed")
+        return [config.directUrls[0]]
+
+    with patch.object(scraper, 'scrape_posts', side_effect=fake_scrape):
+        results = list(scraper.scrape_many(configs, max_concurrency=3))
+
+    assert len(configs) == 6
+    assert in_flight['peak'] == 3
+    assert sorted(result.index for result in results) == list(range(6))
+    failed = [result for result in results if not result.ok]
+    assert len(failed) == 1
+    assert isinstance(failed[0].error, RuntimeError)
+    assert all(len(result.posts) == 1 for result in results if result.ok)
+
+def _async_scraper(fake_client):
+    """Create an async scraper on a fake client, running on its virtual clock."""
+    with patch('scraper_service.ApifyClientAsync', return_value=fake_client), \
+            patch.dict('os.environ', {'APIFY_API_TOKEN': 'test_token'}):
+        return AsyncInstagramScraperService()
+
+def test_async_scrape_posts(mock_config, fake_items):
+    """Test that the async service streams the same posts as the sync one."""
+    fake_client = FakeApifyClientAsync(fake_items[:50], duration=30)
+    scraper = _async_scraper(fake_client)
+
+    with patch('scraper_service.time.monotonic', fake_client.clock.monotonic):
+        results = asyncio.run(scraper.scrape_posts(mock_config))
+
+    assert [post.shortCode for post in results] == [f"post{i}" for i in range(50)]
+    assert fake_client.clock.now == pytest.approx(30)
+    assert fake_client.calls['run.abort'] == 0
+
+def test_async_iter_posts_cancellation_aborts_run(mock_config, fake_items):
+    """Test that cancelling an in-progress scrape aborts the actor run."""
+    fake_client = FakeApifyClientAsync(fake_items, duration=600)
+    scraper = _async_scraper(fake_client)
+    received = []
+
+    async def consume():
+        async for post in scraper.iter_posts(mock_config):
+            received.append(post)
+
+    async def main():
+        task = asyncio.create_task(consume())
+        while not received:
+            await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    with patch('scraper_service.time.monotonic', fake_client.clock.monotonic):
+        asyncio.run(main())
+
+    assert 0 < len(received) < len(fake_items)
+    assert fake_client.calls['run.abort'] == 1
+    assert fake_client.current_run.info()['status'] == 'ABORTED'
+
+def test_async_convert_matches_sync(scraper, mock_apify_client):
+    """Test that both services share the same item conversion."""
+    item = next(mock_apify_client.dataset().iterate_items())
+    async_scraper = _async_scraper(FakeApifyClientAsync([]))
+
+    assert async_scraper._convert_apify_to_model(item) == scraper._convert_apify_to_model(item)
+
+def test_conversion_logs_once_per_batch(scraper, mock_config, fake_items, caplog):
+    """Test that conversion logs aggregate counters instead of per-item lines."""
+    items = fake_items[:50]
+    items[7] = dict(items[7], displayUrl='not a url')
+    scraper.client = FakeApifyClient(items)
+
+    with caplog.at_level(logging.INFO, logger='scraper_service'):
+        results = list(scraper.iter_posts(mock_config))
+
+    assert len(results) == 49
+    messages = [record.getMessage() for record in caplog.records]
+    assert "Converted 49/50 items (0 skipped, 1 failed)" in messages
+    assert len(messages) < 10
+    assert not any(record.exc_info for record in caplog.records)
+
+def test_convert_batch_matches_per_item_conversion(scraper, fake_items):
+    """Test that batch validation drops invalid items and keeps the rest."""
+    items = fake_items[:20]
+    items[3] = dict(items[3], displayUrl='not a url')
+    items[5] = {key: value for key, value in items[5].items() if key not in ('shortCode', 'url')}
+    stats = ConversionStats()
+
+    posts = scraper.convert_batch(items, stats=stats)
+
+    expected = [scraper._convert_apify_to_model(item) for item in items]
+    assert posts == [post for post in expected if post]
+    assert (stats.items, stats.converted, stats.skipped, stats.failed) == (20, 18, 1, 1)
+
+def test_convert_batch_trusted_skips_validation(scraper, fake_items):
+    """Test that trusted mode constructs posts without validating them."""
+    validated = scraper.convert_batch(fake_items[:5])
+    with patch('scraper_service._POST_LIST_ADAPTER') as adapter:
+        trusted = scraper.convert_batch(fake_items[:5], trusted=True)
+
+    adapter.validate_python.assert_not_called()
+    assert [post.shortCode for post in trusted] == [post.shortCode for post in validated]
+    assert trusted[0].displayUrl == fake_items[0]['displayUrl']
+    assert trusted[0].timestamp == validated[0].timestamp
+
+def test_timed_out_scrape_reattaches_to_run(mock_config, fake_items, tmp_path):
+    """Test that a scrape after a timeout continues the same actor run."""
+    checkpoints = CheckpointStore(tmp_path / "checkpoints.sqlite")
+    fake_client = FakeApifyClient(fake_items, duration=900)
+
+    with pytest.raises(TimeoutError):
+        _run_with_fake(fake_client, mock_config.model_copy(update={'maxWaitSecs': 60}), checkpoints)
+    checkpoint = checkpoints.get(mock_config.fingerprint())
+    assert checkpoint.run_id == fake_client.current_run.id
+    assert checkpoint.offset > 0
+
+    results = _run_with_fake(fake_client, mock_config.model_copy(update={'maxWaitSecs': 1200}), checkpoints)
+
+    assert [post.shortCode for post in results] == [item['shortCode'] for item in fake_items]
+    assert fake_client.calls['actor.start'] == 1
+    assert checkpoints.get(mock_config.fingerprint()) is None  # Cleared once the run finished
+
+def test_failed_dataset_reads_resume_from_checkpoint(mock_config, fake_items, tmp_path):
+    """Test that a scrape broken by dataset errors partway through resumes without a new run."""
+    checkpoints = CheckpointStore(tmp_path / "checkpoints.sqlite")
+    fake_client = FakeApifyClient(fake_items, duration=0)
+    fake_client.fail_dataset_after = 1000
+    config = mock_config.model_copy(update={'maxWaitSecs': 30})
+
+    with patch('scraper_service.time.monotonic', fake_client.clock.monotonic), \
+            patch('scraper_service.time.sleep', fake_client.clock.sleep):
+        scraper = InstagramScraperService(api_token='test_token', checkpoints=checkpoints)
+        scraper.client = fake_client
+        received = []
+        with pytest.raises(TimeoutError):
+            for post in scraper.iter_posts(config):
+                received.append(post)
+        assert len(received) == 1000
+        assert checkpoints.get(config.fingerprint()).offset == 1000
+
+        # Only the items the first consumer didn't receive are read again
+        fake_client.fail_dataset_after = None
+        rest = list(scraper.iter_posts(config, resume=True))
+
+    assert [post.shortCode for post in received + rest] == [item['shortCode'] for item in fake_items]
+    assert fake_client.calls['actor.start'] == 1
+
+def test_unusable_checkpoint_starts_new_run(mock_config, fake_items, tmp_path):
+    """Test that a checkpoint of a failed or vanished run is discarded."""
+    checkpoints = CheckpointStore(tmp_path / "checkpoints.sqlite")
+    checkpoints.save(mock_config.fingerprint(), "deleted_run", "deleted_run_dataset", 500)
+    fake_client = FakeApifyClient(fake_items[:10])
+
+    results = _run_with_fake(fake_client, mock_config, checkpoints)
+
+    assert len(results) == 10
+    assert fake_client.calls['actor.start'] == 1
+    assert checkpoints.get(mock_config.fingerprint()) is None
+
+def test_seen_index_known_and_add(tmp_path):
+    """Test that the seen index reports only recorded shortCodes and keeps duplicates once."""
+    seen = SeenIndex(tmp_path / "seen.sqlite")
+    seen.add(["a", "b", "a"])
+
+    assert seen.known(["a", "c"]) == {"a"}
+    assert "b" in seen and "c" not in seen
+    assert len(seen) == 2
+    assert seen.known(f"code{i}" for i in range(2000)) == set()  # More codes than one IN query allows
+
+def test_duplicate_items_dropped_before_conversion(mock_config, fake_items, caplog):
+    """Test that items repeating a shortCode within a run are converted once."""
+    fake_client = FakeApifyClient(fake_items[:10] + fake_items[:5])
+    with caplog.at_level(logging.INFO, logger='scraper_service'):
+        results = _run_with_fake(fake_client, mock_config)
+
+    assert [post.shortCode for post in results] == [item['shortCode'] for item in fake_items[:10]]
+    assert any("Converted 10/10 items" in message for message in caplog.messages)
+
+def test_only_new_skips_posts_from_earlier_runs(mock_config, fake_items, tmp_path, caplog):
+    """Test that an "only new" scrape returns and converts just the posts no earlier scrape returned."""
+    seen = SeenIndex(tmp_path / "seen.sqlite")
+    _run_with_fake(FakeApifyClient(fake_items[:10]), mock_config, seen=seen)
+    assert len(seen) == 10
+
+    config = mock_config.model_copy(update={'onlyNew': True})
+    with caplog.at_level(logging.INFO, logger='scraper_service'):
+        results = _run_with_fake(FakeApifyClient(fake_items[:15]), config, seen=seen)
+
+    assert [post.shortCode for post in results] == [item['shortCode'] for item in fake_items[10:15]]
+    assert any("Converted 5/5 items" in message for message in caplog.messages)
+    assert len(seen) == 15
+    # Without onlyNew the index is still updated but nothing is filtered
+    assert len(_run_with_fake(FakeApifyClient(fake_items[:15]), mock_config, seen=seen)) == 15
@@ -0,0 +1,67 @@
+import io
+import pytest
+from PIL import Image
+from thumbnails import THUMBNAIL_SIZE, ThumbnailService, make_thumbnail
+
+class _StubFetcher:
+    """Returns fixed bytes per URL and counts fetches."""
+
+    def __init__(self, images):
+        self.images = images
+        self.fetches = 0
+
+    def fetch(self, url):
+        self.fetches += 1
+        return self.images[url]
+
+def _jpeg(width=1080, height=1350, color=(200, 80, 40)):
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(output, format="JPEG", quality=95)
+    return output.getvalue()
+
+def test_thumbnail_is_square_and_smaller():
+    """Test that a portrait post image becomes a small centre-cropped square."""
+    source = _jpeg()
+    thumbnail = make_thumbnail(source)
+
+    with Image.open(io.BytesIO(thumbnail.data)) as image:
+        assert image.size == (THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+    assert len(thumbnail.data) < len(source)
+    assert thumbnail.mime in ("image/webp", "image/jpeg")
+
+def test_small_images_are_not_upscaled():
+    """Test that images already below the thumbnail size keep their dimensions."""
+    thumbnail = make_thumbnail(_jpeg(320, 200))
+
+    with Image.open(io.BytesIO(thumbnail.data)) as image:
+        assert image.size == (320, 200)
+
+def test_thumbnails_are_cached_by_content():
+    """Test that the same image behind different URLs is encoded once."""
+    source = _jpeg()
+    fetcher = _StubFetcher({"https://cdn-a/p.jpg": source, "https://cdn-b/p.jpg": source})
+    service = ThumbnailService(fetcher=fetcher)
+
+    first = service.thumbnail("https://cdn-a/p.jpg")
+    second = service.thumbnail("https://cdn-b/p.jpg")
+
+    assert first == second
+    assert service.generated == 1
+    assert service.cache.stats()['memory_hits'] == 1
+
+def test_undecodable_image_is_served_unchanged():
+    """Test that bytes Pillow cannot read fall back to the original data."""
+    service = ThumbnailService(fetcher=_StubFetcher({"https://cdn/x.jpg": b"not an image"}))
+
+    assert service.thumbnail("https://cdn/x.jpg").data == b"not an image"
+    assert service.generated == 0
+
+def test_generate_reports_fetch_errors():
+    """Test that generate() returns per-URL errors instead of raising."""
+    source = _jpeg()
+    service = ThumbnailService(fetcher=_StubFetcher({"https://cdn/ok.jpg": source}))
+
+    results = service.generate(["https://cdn/ok.jpg", "https://cdn/missing.jpg"])
+
+    assert results["https://cdn/ok.jpg"] is None
+    assert isinstance(results["https://cdn/missing.jpg"], KeyError)
@@ -0,0 +1,113 @@
+"""
+Card-sized thumbnails for post images.
+
+Cards display images as a 1:1 ``object-fit: cover`` square, so sending the
+full 1080px CDN image is wasted payload. Thumbnails are centre-cropped and
+downscaled to ``THUMBNAIL_SIZE``, encoded as WebP (JPEG if Pillow lacks
+WebP), and cached by a hash of the source image's content, so identical
+images reached through different URLs are only encoded once.
+
+Pillow is optional; without it the original image bytes are served.
+"""
+import hashlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from image_fetcher import ImageCache, ImageFetcher, get_default_fetcher
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # pragma: no cover - Pillow ships with Streamlit
+    Image = None
+
+THUMBNAIL_SIZE = 480
+THUMBNAIL_QUALITY = 80
+
+
+class Thumbnail(NamedTuple):
+    data: bytes
+    mime: str
+
+
+def _output_format() -> str:
+    return "WEBP" if Image is not None and features.check("webp") else "JPEG"
+
+
+def make_thumbnail(data: bytes, size: int = THUMBNAIL_SIZE, image_format: Optional[str] = None,
+                   quality: int = THUMBNAIL_QUALITY) -> Thumbnail:
+    """Centre-crop and downscale image bytes to a ``size`` x ``size`` thumbnail."""
+    if Image is None:
+        return Thumbnail(data, "image/jpeg")
+    image_format = image_format or _output_format()
+    with Image.open(io.BytesIO(data)) as image:
+        image.draft("RGB", (size, size))  # Lets the JPEG decoder skip full-size decoding
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        if min(image.size) > size:
+            image = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, format=image_format, quality=quality)
+    return Thumbnail(output.getvalue(), f"image/{image_format.lower()}")
+
+
+def _content_key(digest: str) -> str:
+    return digest
+
+
+class ThumbnailService:
+    """Fetches source images and serves cached thumbnails keyed by content hash."""
+
+    def __init__(self, fetcher: Optional[ImageFetcher] = None, cache: Optional[ImageCache] = None,
+                 size: int = THUMBNAIL_SIZE):
+        self.fetcher = fetcher
+        self.cache = cache if cache is not None else ImageCache(max_items=2048, key=_content_key)
+        self.size = size
+        self.image_format = _output_format()
+        self.generated = 0
+
+    def _cache_key(self, data: bytes) -> str:
+        digest = hashlib.sha1(data).hexdigest()
+        return f"{digest}-{self.size}-{self.image_format}"
+
+    def thumbnail(self, url: str) -> Thumbnail:
+        """Thumbnail for the image at ``url``; fetch errors propagate to the caller."""
+        data = (self.fetcher or get_default_fetcher()).fetch(url)
+        key = self._cache_key(data)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return Thumbnail(cached, f"image/{self.image_format.lower()}")
+        try:
+            thumbnail = make_thumbnail(data, self.size, self.image_format)
+        except Exception:
+            # Not decodable by Pillow (or an unusual format); serve it as is
+            return Thumbnail(data, "image/jpeg")
+        self.generated += 1
+        self.cache.put(key, thumbnail.data)
+        return thumbnail
+
+    def generate(self, urls: Iterable[str], max_workers: int = 8) -> Dict[str, Optional[Exception]]:
+        """Build thumbnails for ``urls`` on a worker pool; Pillow releases the GIL while resizing."""
+        def build(url: str) -> Optional[Exception]:
+            try:
+                self.thumbnail(url)
+            except Exception as e:
+                return e
+            return None
+
+        urls = list(dict.fromkeys(urls))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="thumbnail") as pool:
+            return dict(zip(urls, pool.map(build, urls)))
+
+
+_default_service: Optional[ThumbnailService] = None
+
+
+def get_thumbnail_service() -> ThumbnailService:
+    """Process-wide thumbnail service (disk tier in ``THUMBNAIL_CACHE_DIR`` if set)."""
+    global _default_service
+    if _default_service is None:
+        _default_service = ThumbnailService(
+            cache=ImageCache(max_items=2048, disk_dir=os.getenv("THUMBNAIL_CACHE_DIR") or None, key=_content_key)
+        )
+    return _default_service